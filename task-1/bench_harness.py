@@ -0,0 +1,250 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import shlex
+import socket
+import subprocess
+import sys
+
+MEMTIER_BIN = os.environ.get("MEMTIER_BIN", "/opt/redislabs/bin/memtier_benchmark")
+# Single source of the target and workload; both tools run exactly its flags
+# unless overridden by arguments after --, so their results are comparable
+MEMTIER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memtier_command.sh")
+
+# memtier column header -> result field
+_MEMTIER_COLUMNS = {
+    "ops/sec": "ops_sec",
+    "hits/sec": "hits_sec",
+    "misses/sec": "misses_sec",
+    "avg. latency": "avg_ms",
+    "latency": "avg_ms",
+    "p50 latency": "p50_ms",
+    "p99 latency": "p99_ms",
+    "p99.9 latency": "p999_ms",
+    "kb/sec": "kb_sec",
+}
+
+# metric -> True if higher is better
+COMPARED_METRICS = {
+    "ops_sec": True,
+    "p50_ms": False,
+    "p99_ms": False,
+    "p999_ms": False,
+}
+
+
+def parse_memtier_output(text: str):
+    """
+    Parse the ALL STATS table printed by memtier_benchmark into
+    {"sets": {...}, "gets": {...}, "totals": {...}}. Columns are read from the
+    header line, so older memtier versions without percentiles still parse.
+    """
+    lines = text.splitlines()
+    header_idx = None
+    for i, line in enumerate(lines):
+        if line.strip().startswith("Type") and "Ops/sec" in line:
+            header_idx = i
+    if header_idx is None:
+        raise ValueError("No memtier stats table found in output")
+
+    columns = [c.strip().lower() for c in re.split(r"\s{2,}", lines[header_idx].strip())][1:]
+    result = {}
+    for line in lines[header_idx + 1:]:
+        parts = line.split()
+        if not parts or parts[0].startswith("-"):
+            continue
+        row = parts[0].lower()
+        if row not in ("sets", "gets", "totals"):
+            continue
+        values = {}
+        for col, raw in zip(columns, parts[1:]):
+            field = _MEMTIER_COLUMNS.get(col)
+            if field and raw != "---":
+                values[field] = float(raw)
+        result[row] = values
+    if "totals" not in result:
+        raise ValueError("No Totals row found in memtier output")
+    return result
+
+
+def script_args(path: str = MEMTIER_SCRIPT):
+    """The memtier flags memtier_command.sh passes before its own "$@" arguments"""
+    with open(path) as f:
+        tokens = shlex.split(f.read().replace("\\\n", " "), comments=True)
+    if "$@" not in tokens:
+        raise ValueError(f"{path} does not forward its arguments (\"$@\")")
+    return tokens[1:tokens.index("$@")]
+
+
+def effective_params(argv):
+    """
+    Target ("host:port") and workload settings of a load generator command line,
+    read with loadgen's parser (it takes memtier's flag names; later flags win).
+    Flags loadgen does not know are kept verbatim under "other".
+    """
+    import loadgen
+
+    args, other = loadgen.build_parser().parse_known_args(argv)
+    workload = {k: v for k, v in vars(args).items() if k not in ("server", "port", "json_out")}
+    if other:
+        workload["other"] = other
+    return f"{args.server}:{args.port}", workload
+
+
+def run_memtier(extra_args):
+    """Run memtier_command.sh plus extra flags; returns (resolved memtier command, parsed stats)"""
+    cmd = [MEMTIER_BIN] + script_args() + list(extra_args)
+    print(f"[Bench] Running: {shlex.join(['bash', MEMTIER_SCRIPT] + list(extra_args))}")
+    proc = subprocess.run(["bash", MEMTIER_SCRIPT] + list(extra_args), capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stdout)
+        print(proc.stderr, file=sys.stderr)
+        raise RuntimeError(f"memtier_benchmark exited with status {proc.returncode}")
+    return cmd, parse_memtier_output(proc.stdout)
+
+
+def run_loadgen(extra_args):
+    """Run the built-in load generator in-process; returns (command, stats)"""
+    import loadgen
+
+    argv = script_args() + list(extra_args)
+    cmd = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "loadgen.py")] + argv
+    print(f"[Bench] Running: {shlex.join(cmd)}")
+    args = loadgen.build_parser().parse_args(argv)
+    result = loadgen.run_benchmark(loadgen.config_from_args(args))
+    loadgen.print_report(result)
+    return cmd, {name: result[name] for name in ("sets", "gets", "totals")}
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def environment():
+    return {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git_commit(),
+    }
+
+
+def comparable(result, baseline):
+    """Reason why result cannot be compared with baseline, or None"""
+    for field in ("tool", "target"):
+        if result.get(field) != baseline.get(field):
+            return f"{field} differs (baseline {baseline.get(field)!r}, this run {result.get(field)!r})"
+    base, cur = baseline.get("workload") or {}, result["workload"]
+    changed = sorted(k for k in base.keys() | cur.keys() if base.get(k) != cur.get(k))
+    if not base or changed:
+        return "workload differs: " + (", ".join(f"{k} {base.get(k)!r} -> {cur.get(k)!r}" for k in changed)
+                                       if base else "baseline has no workload, save it again")
+    return None
+
+
+def compare(result, baseline, threshold_pct: float):
+    """
+    Compare the Totals row against a baseline. Returns a list of
+    (metric, baseline, current, change_pct, regressed) tuples.
+    """
+    rows = []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        base = baseline["totals"].get(metric)
+        cur = result["totals"].get(metric)
+        if not base or cur is None:
+            continue
+        change = (cur - base) / base * 100
+        regressed = change < -threshold_pct if higher_is_better else change > threshold_pct
+        rows.append((metric, base, cur, change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the memtier workload, store results as JSON and compare against a baseline. "
+                    "Arguments after -- are passed to memtier_benchmark / loadgen.py."
+    )
+    parser.add_argument("--tool", choices=["memtier", "loadgen"], default="memtier", help="Load generator to run")
+    parser.add_argument("--output", default=None, help="Write this run's result JSON here")
+    parser.add_argument("--baseline", default=None, help="Baseline result JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new --baseline")
+    parser.add_argument("--threshold", type=float, default=5.0,
+                        help="Max allowed regression in percent (throughput drop or latency increase)")
+    parser.add_argument("--command-file", default=None,
+                        help="Also record the executed memtier command here, e.g. /tmp/memtier_benchmark.txt")
+    parser.add_argument("--input", default=None, help="Parse an existing memtier output file instead of running")
+    args, extra = parser.parse_known_args()
+    if extra and extra[0] == "--":
+        extra = extra[1:]
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline, the file to save to")
+    if args.input and args.tool != "memtier":
+        parser.error("--input parses memtier output and cannot be combined with --tool loadgen")
+
+    if args.input:
+        with open(args.input) as f:
+            cmd, stats = None, parse_memtier_output(f.read())
+    elif args.tool == "memtier":
+        cmd, stats = run_memtier(extra)
+    else:
+        cmd, stats = run_loadgen(extra)
+    # --input is assumed to be a memtier_command.sh run plus the extra flags
+    target, workload = effective_params(script_args() + extra)
+
+    result = {
+        "tool": args.tool,
+        "command": shlex.join(cmd) if cmd else None,
+        "target": target,
+        "workload": workload,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": environment(),
+        **stats,
+    }
+    t = result["totals"]
+    print(f"[Bench] Totals: {t.get('ops_sec', 0):.2f} ops/sec, p50 {t.get('p50_ms', 0):.3f} ms, "
+          f"p99 {t.get('p99_ms', 0):.3f} ms, p99.9 {t.get('p999_ms', 0):.3f} ms")
+
+    if args.command_file and cmd and args.tool == "memtier":
+        with open(args.command_file, "w") as f:
+            f.write(shlex.join(cmd) + "\n")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[Bench] Result written to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[Bench] Baseline saved to {args.baseline}")
+        return 0
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        reason = comparable(result, baseline)
+        if reason:
+            print(f"[Bench][ERROR] Not comparable with {args.baseline}: {reason}")
+            return 2
+        rows = compare(result, baseline, args.threshold)
+        print(f"\n{'Metric':<10}{'Baseline':>14}{'Current':>14}{'Change':>10}")
+        for metric, base, cur, change, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{metric:<10}{base:>14.3f}{cur:>14.3f}{change:>+9.1f}%{flag}")
+        if any(r[4] for r in rows):
+            print(f"[Bench][FAIL] Regression beyond {args.threshold}% against {args.baseline}")
+            return 1
+        print(f"[Bench] Within {args.threshold}% of baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
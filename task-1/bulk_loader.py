@@ -0,0 +1,112 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CONNECTIONS = 4
+
+
+def make_client(host: str, port: int, connections: int = DEFAULT_CONNECTIONS):
+    """Create a client whose pool holds one connection per worker thread"""
+    pool = redis.BlockingConnectionPool(
+        host=host,
+        port=port,
+        max_connections=connections,
+        decode_responses=True,
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+def _chunks(start: int, end: int, batch_size: int, reverse: bool = False):
+    """Split the inclusive range start..end into (lo, hi) batches"""
+    bounds = [(lo, min(lo + batch_size - 1, end)) for lo in range(start, end + 1, batch_size)]
+    if reverse:
+        bounds.reverse()
+    return bounds
+
+
+def _ordered_map(executor, fn, items, window: int):
+    """Like executor.map, but keeps at most `window` batches in flight"""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _write_batch(client, lo: int, hi: int, key_prefix: str, mode: str):
+    if mode == "mset":
+        client.mset({f"{key_prefix}{i}": i for i in range(lo, hi + 1)})
+    else:
+        pipe = client.pipeline(transaction=False)
+        for i in range(lo, hi + 1):
+            pipe.set(f"{key_prefix}{i}", i)
+        pipe.execute()
+    return hi - lo + 1
+
+
+def _read_batch(client, lo: int, hi: int, key_prefix: str, mode: str):
+    # Batches are read back from the highest key down to the lowest
+    ids = list(range(hi, lo - 1, -1))
+    keys = [f"{key_prefix}{i}" for i in ids]
+    if mode == "mset":
+        values = client.mget(keys)
+    else:
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+        values = pipe.execute()
+    return list(zip(ids, values))
+
+
+def bulk_load(client, start: int, end: int, batch_size: int = DEFAULT_BATCH_SIZE,
+              connections: int = DEFAULT_CONNECTIONS, key_prefix: str = "", mode: str = "pipeline"):
+    """
+    Write keys start..end (value = key number) in batches over several connections.
+    mode is "pipeline" (one pipelined SET per key) or "mset" (one MSET per batch).
+    """
+    batches = _chunks(start, end, batch_size)
+    written = 0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        work = lambda b: _write_batch(client, b[0], b[1], key_prefix, mode)
+        for count in _ordered_map(executor, work, batches, connections * 2):
+            written += count
+    elapsed = time.perf_counter() - t0
+    return {
+        "keys": written,
+        "seconds": elapsed,
+        "keys_per_sec": written / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def read_reverse(client, start: int, end: int, batch_size: int = DEFAULT_BATCH_SIZE,
+                 connections: int = DEFAULT_CONNECTIONS, key_prefix: str = "", mode: str = "pipeline",
+                 on_batch=None):
+    """
+    Read keys end..start back in reverse order, batched the same way as bulk_load.
+    mode "mset" reads with chunked MGET, "pipeline" with pipelined GETs.
+    on_batch, if given, is called with each list of (key_number, value) in order.
+    """
+    batches = _chunks(start, end, batch_size, reverse=True)
+    read = 0
+    missing = 0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        work = lambda b: _read_batch(client, b[0], b[1], key_prefix, mode)
+        for pairs in _ordered_map(executor, work, batches, connections * 2):
+            read += len(pairs)
+            missing += sum(1 for _, value in pairs if value is None)
+            if on_batch:
+                on_batch(pairs)
+    elapsed = time.perf_counter() - t0
+    return {
+        "keys": read,
+        "missing": missing,
+        "seconds": elapsed,
+        "keys_per_sec": read / elapsed if elapsed > 0 else 0.0,
+    }
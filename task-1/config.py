@@ -0,0 +1,6 @@
+# Redis Data Access - Connection Details for Task 1
+SOURCE_HOST = "172.16.22.21"
+SOURCE_PORT = 12000
+
+REPLICA_HOST = "172.16.22.22"
+REPLICA_PORT = 13000
@@ -0,0 +1,110 @@
+import math
+
+# Latencies are recorded in microseconds, from 1us up to ~60s
+LOWEST_US = 1
+HIGHEST_US = 60_000_000
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear latency histogram.
+
+    Values are grouped by power of two, and each power of two is split into
+    2**sub_bucket_bits linear sub-buckets, so every recorded value keeps the same
+    relative precision (~0.8% with the default 7 bits) in constant memory.
+    Histograms from several processes can be merged with add().
+    """
+
+    def __init__(self, sub_bucket_bits: int = 7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_buckets = 1 << sub_bucket_bits
+        self.magnitudes = max(1, math.ceil(math.log2(HIGHEST_US))) + 1
+        self.counts = [0] * (self.magnitudes * self.sub_buckets)
+        self.total = 0
+        self.min_us = None
+        self.max_us = 0
+        self.sum_us = 0
+
+    def _index(self, value_us: int):
+        if value_us < self.sub_buckets:
+            return value_us
+        magnitude = value_us.bit_length() - self.sub_bucket_bits
+        sub = value_us >> magnitude
+        return magnitude * self.sub_buckets + sub
+
+    def _value_at(self, index: int):
+        magnitude, sub = divmod(index, self.sub_buckets)
+        if magnitude == 0:
+            return sub
+        # Midpoint of the sub-bucket: values in it share the top sub_bucket_bits bits
+        return ((sub << magnitude) + ((sub + 1) << magnitude)) // 2
+
+    def record(self, value_us: float):
+        value_us = min(max(int(value_us), LOWEST_US), HIGHEST_US)
+        self.counts[self._index(value_us)] += 1
+        self.total += 1
+        self.sum_us += value_us
+        self.max_us = max(self.max_us, value_us)
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+
+    def add(self, other: "LatencyHistogram"):
+        """Merge another histogram (with the same precision) into this one"""
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+
+    def percentile(self, pct: float):
+        """Latency in microseconds at the given percentile (0-100)"""
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(self.total * pct / 100.0))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(self._value_at(i), self.max_us)
+        return self.max_us
+
+    def mean(self):
+        return self.sum_us / self.total if self.total else 0.0
+
+    def summary(self):
+        """Percentiles in milliseconds, in the same shape memtier reports them"""
+        return {
+            "count": self.total,
+            "avg_ms": self.mean() / 1000,
+            "min_ms": (self.min_us or 0) / 1000,
+            "p50_ms": self.percentile(50) / 1000,
+            "p99_ms": self.percentile(99) / 1000,
+            "p999_ms": self.percentile(99.9) / 1000,
+            "max_ms": self.max_us / 1000,
+        }
+
+    def to_dict(self):
+        """Sparse, JSON/pickle friendly form"""
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "counts": {i: c for i, c in enumerate(self.counts) if c},
+            "total": self.total,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "sum_us": self.sum_us,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        h = cls(data["sub_bucket_bits"])
+        for i, c in data["counts"].items():
+            h.counts[int(i)] = c
+        h.total = data["total"]
+        h.min_us = data["min_us"]
+        h.max_us = data["max_us"]
+        h.sum_us = data["sum_us"]
+        return h
@@ -0,0 +1,273 @@
+import argparse
+import hashlib
+import queue
+import sys
+import threading
+import time
+
+import redis
+
+from config import SOURCE_HOST, SOURCE_PORT, REPLICA_HOST, REPLICA_PORT
+
+DEFAULT_SCAN_COUNT = 1000
+COMPARE_MODES = ("dump", "typed", "value", "exists")
+
+# Logical value reads per data type, for "typed" digests
+_TYPED_READS = {
+    b"string": lambda pipe, key: pipe.get(key),
+    b"hash": lambda pipe, key: pipe.hgetall(key),
+    b"list": lambda pipe, key: pipe.lrange(key, 0, -1),
+    b"set": lambda pipe, key: pipe.smembers(key),
+    b"zset": lambda pipe, key: pipe.zrange(key, 0, -1, withscores=True),
+    b"stream": lambda pipe, key: pipe.xrange(key),
+}
+
+_DONE = object()
+
+
+def scan_batches(client, count: int = DEFAULT_SCAN_COUNT, match=None):
+    """Yield the keyspace one SCAN reply at a time, without keeping earlier batches"""
+    cursor = 0
+    while True:
+        cursor, keys = client.scan(cursor=cursor, match=match, count=count)
+        if keys:
+            yield keys
+        if cursor == 0:
+            break
+
+
+def _canonical(kind, value):
+    """Order-independent form of a typed read (hash fields and set members are unordered)"""
+    if isinstance(value, dict):
+        value = sorted(value.items())
+    elif isinstance(value, set):
+        value = sorted(value)
+    return hashlib.blake2b(repr((kind, value)).encode(), digest_size=16).digest()
+
+
+def _typed_digests(client, keys):
+    types = client.pipeline(transaction=False)
+    for key in keys:
+        types.type(key)
+    kinds = types.execute()
+    pipe = client.pipeline(transaction=False)
+    for key, kind in zip(keys, kinds):
+        # Module types have no generic read; their DUMP is the best available fingerprint
+        _TYPED_READS.get(kind, lambda p, k: p.dump(k))(pipe, key)
+    digests = []
+    for kind, reply in zip(kinds, pipe.execute(raise_on_error=False)):
+        if isinstance(reply, redis.ResponseError):
+            digests.append(reply)
+        elif isinstance(reply, Exception):
+            raise reply
+        elif kind == b"none" or reply is None:
+            digests.append(None)
+        else:
+            digests.append(_canonical(kind, reply))
+    return digests
+
+
+def fetch_digests(client, keys, mode: str = "dump"):
+    """
+    Fetch one comparable fingerprint per key in a single pipeline.
+    dump:   blake2b of the DUMP payload (works for every data type, but the
+            payload also carries the RDB version and the internal encoding, so
+            equal values can differ; see confirm_mismatches)
+    typed:  blake2b of the logical value, read per data type (TYPE, then GET,
+            HGETALL, LRANGE, SMEMBERS, ZRANGE or XRANGE; two round trips)
+    value:  raw GET value (string keyspaces only, e.g. memtier)
+    exists: True/False only
+    Missing keys come back as None and keys the server refused (e.g. WRONGTYPE
+    for GET) as the redis.ResponseError, so they are not mistaken for missing.
+    """
+    if mode == "typed":
+        return _typed_digests(client, keys)
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        if mode == "dump":
+            pipe.dump(key)
+        elif mode == "value":
+            pipe.get(key)
+        else:
+            pipe.exists(key)
+    replies = pipe.execute(raise_on_error=False)
+
+    digests = []
+    for reply in replies:
+        if isinstance(reply, redis.ResponseError):
+            digests.append(reply)
+        elif isinstance(reply, Exception):
+            raise reply
+        elif reply is None or reply == 0:
+            digests.append(None)
+        elif mode == "dump":
+            digests.append(hashlib.blake2b(reply, digest_size=16).digest())
+        elif mode == "exists":
+            digests.append(True)
+        else:
+            digests.append(reply)
+    return digests
+
+
+def confirm_mismatches(source, replica, keys):
+    """
+    Keys among DUMP mismatches whose logical values really differ, as (kind, key).
+    DUMP bytes differ between servers with another RDB version or other encoding
+    thresholds (listpack vs hashtable, intset vs hashtable) for identical data.
+    """
+    diffs = []
+    if keys:
+        for key, s, d in zip(keys, _typed_digests(source, keys), _typed_digests(replica, keys)):
+            if s is None:
+                continue
+            if isinstance(s, redis.ResponseError) or isinstance(d, redis.ResponseError):
+                diffs.append(("error", key))
+            elif d is None:
+                diffs.append(("missing", key))
+            elif s != d:
+                diffs.append(("mismatch", key))
+    return diffs
+
+
+class KeyspaceDiff:
+    """
+    Streaming comparator between source-db and replica-db.
+
+    Two threads SCAN the databases in parallel: one walks the source and looks each
+    batch up on the replica (missing / mismatched keys), the other walks the replica
+    and looks each batch up on the source (extra keys). In dump mode, DUMP
+    mismatches are confirmed value by value before being reported. Only one SCAN batch per side
+    is held at a time and results flow through a bounded queue, so memory stays
+    flat regardless of keyspace size.
+    """
+
+    def __init__(self, source, replica, scan_count: int = DEFAULT_SCAN_COUNT, mode: str = "dump",
+                 match=None, queue_size: int = 10000):
+        if mode not in COMPARE_MODES:
+            raise ValueError(f"mode must be one of {COMPARE_MODES}")
+        self.source = source
+        self.replica = replica
+        self.scan_count = scan_count
+        self.mode = mode
+        self.match = match
+        self.queue_size = queue_size
+        self.stats = {"source_keys": 0, "replica_keys": 0, "missing": 0, "extra": 0, "mismatch": 0, "error": 0}
+
+    def _put(self, q, stop, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _walk_source(self, q, stop):
+        for keys in scan_batches(self.source, self.scan_count, self.match):
+            if stop.is_set():
+                return
+            self.stats["source_keys"] += len(keys)
+            src = fetch_digests(self.source, keys, self.mode)
+            dst = fetch_digests(self.replica, keys, self.mode)
+            diffs, suspects = [], []
+            for key, s, d in zip(keys, src, dst):
+                if s is None:
+                    # Key expired or was deleted on the source during the scan
+                    continue
+                if isinstance(s, redis.ResponseError) or isinstance(d, redis.ResponseError):
+                    diffs.append(("error", key))
+                elif d is None:
+                    diffs.append(("missing", key))
+                elif s != d:
+                    suspects.append(key)
+            if self.mode == "dump":
+                diffs.extend(confirm_mismatches(self.source, self.replica, suspects))
+            else:
+                diffs.extend(("mismatch", key) for key in suspects)
+            for kind, key in diffs:
+                self.stats[kind] += 1
+                if not self._put(q, stop, (kind, key)):
+                    return
+
+    def _walk_replica(self, q, stop):
+        for keys in scan_batches(self.replica, self.scan_count, self.match):
+            if stop.is_set():
+                return
+            self.stats["replica_keys"] += len(keys)
+            src = fetch_digests(self.source, keys, "exists")
+            for key, s in zip(keys, src):
+                if s is None or isinstance(s, redis.ResponseError):
+                    kind = "extra" if s is None else "error"
+                    self.stats[kind] += 1
+                    if not self._put(q, stop, (kind, key)):
+                        return
+
+    def _run(self, target, q, stop, errors):
+        try:
+            target(q, stop)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            self._put(q, stop, _DONE)
+
+    def __iter__(self):
+        """Yield (kind, key) tuples where kind is "missing", "extra", "mismatch" or "error" """
+        q = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors = []
+        workers = [
+            threading.Thread(target=self._run, args=(self._walk_source, q, stop, errors), daemon=True),
+            threading.Thread(target=self._run, args=(self._walk_replica, q, stop, errors), daemon=True),
+        ]
+        for w in workers:
+            w.start()
+        remaining = len(workers)
+        try:
+            while remaining:
+                item = q.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            stop.set()
+            for w in workers:
+                w.join()
+        if errors:
+            raise errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream the differences between source-db and replica-db")
+    parser.add_argument("--scan-count", type=int, default=DEFAULT_SCAN_COUNT, help="COUNT hint for SCAN (batch size)")
+    parser.add_argument("--mode", choices=COMPARE_MODES, default="dump",
+                        help="How values are compared: dump (DUMP digests; as DUMP bytes depend on the RDB "
+                             "version and encoding, mismatches are re-checked with typed), typed (logical "
+                             "value per data type), value (GET, strings only) or exists")
+    parser.add_argument("--match", default=None, help="Only compare keys matching this SCAN pattern")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many differences (0 = no limit)")
+    args = parser.parse_args()
+
+    source = redis.Redis(host=SOURCE_HOST, port=SOURCE_PORT)
+    replica = redis.Redis(host=REPLICA_HOST, port=REPLICA_PORT)
+
+    diff = KeyspaceDiff(source, replica, scan_count=args.scan_count, mode=args.mode, match=args.match)
+    print(f"[Diff] Comparing source-db and replica-db (mode={args.mode}, scan count={args.scan_count})...")
+    t0 = time.perf_counter()
+    found = 0
+    for kind, key in diff:
+        print(f"{kind}\t{key.decode(errors='replace')}")
+        found += 1
+        if args.limit and found >= args.limit:
+            print(f"[Diff] Stopping after {found} differences (--limit)")
+            break
+    elapsed = time.perf_counter() - t0
+
+    s = diff.stats
+    print(f"[Diff] Scanned {s['source_keys']} source keys and {s['replica_keys']} replica keys in {elapsed:.2f}s: "
+          f"{s['missing']} missing, {s['extra']} extra, {s['mismatch']} mismatched, {s['error']} errors")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import redis.asyncio as aioredis
+
+from histogram import LatencyHistogram
+
+KEY_PATTERNS = ("R", "S")
+
+
+def parse_ratio(ratio: str):
+    """'1:10' -> (1, 10) SET:GET"""
+    sets, gets = (int(p) for p in ratio.split(":"))
+    if sets < 0 or gets < 0 or sets + gets == 0:
+        raise ValueError(f"Invalid ratio '{ratio}'")
+    return sets, gets
+
+
+def parse_key_pattern(pattern: str):
+    """'R:R' -> ('R', 'R') for SET and GET key selection"""
+    set_p, get_p = pattern.upper().split(":")
+    if set_p not in KEY_PATTERNS or get_p not in KEY_PATTERNS:
+        raise ValueError(f"Unsupported key pattern '{pattern}' (use R or S per side)")
+    return set_p, get_p
+
+
+class KeyChooser:
+    """Random (R) or sequential (S) key selection over [key_min, key_max]"""
+
+    def __init__(self, pattern: str, key_min: int, key_max: int, client_index: int, total_clients: int, rng):
+        self.pattern = pattern
+        self.key_min = key_min
+        self.key_max = key_max
+        self.rng = rng
+        # Sequential clients each start at their own slice of the range, like memtier does per client
+        span = key_max - key_min + 1
+        self.next = key_min + (span * client_index) // max(total_clients, 1)
+
+    def __call__(self):
+        if self.pattern == "R":
+            return self.rng.randint(self.key_min, self.key_max)
+        key = self.next
+        self.next = key + 1 if key < self.key_max else self.key_min
+        return key
+
+
+async def _client_loop(conn, cfg, client_index, total_clients, value, hists, counters, rng):
+    sets, gets = cfg["ratio"]
+    set_pattern, get_pattern = cfg["key_pattern"]
+    choose_set = KeyChooser(set_pattern, cfg["key_minimum"], cfg["key_maximum"], client_index, total_clients, rng)
+    choose_get = KeyChooser(get_pattern, cfg["key_minimum"], cfg["key_maximum"], client_index, total_clients, rng)
+    prefix = cfg["key_prefix"]
+    cycle = sets + gets
+    for i in range(cfg["requests"]):
+        is_set = (i % cycle) < sets
+        if is_set:
+            key = f"{prefix}{choose_set()}"
+            t0 = time.perf_counter_ns()
+            await conn.set(key, value)
+            elapsed_us = (time.perf_counter_ns() - t0) / 1000
+            hists["sets"].record(elapsed_us)
+            counters["sets"] += 1
+        else:
+            key = f"{prefix}{choose_get()}"
+            t0 = time.perf_counter_ns()
+            reply = await conn.get(key)
+            elapsed_us = (time.perf_counter_ns() - t0) / 1000
+            hists["gets"].record(elapsed_us)
+            counters["gets"] += 1
+            counters["hits" if reply is not None else "misses"] += 1
+            counters["bytes"] += len(reply) if reply is not None else 0
+        counters["bytes"] += len(key) + (len(value) if is_set else 0)
+
+
+async def _run_thread(cfg, thread_index):
+    total_clients = cfg["threads"] * cfg["clients"]
+    rng = random.Random(cfg["seed"] + thread_index) if cfg["seed"] is not None else random.Random()
+    value = os.urandom(cfg["data_size"])
+    hists = {"sets": LatencyHistogram(), "gets": LatencyHistogram()}
+    counters = {"sets": 0, "gets": 0, "hits": 0, "misses": 0, "bytes": 0}
+
+    conns = [
+        aioredis.Redis(host=cfg["server"], port=cfg["port"], single_connection_client=True)
+        for _ in range(cfg["clients"])
+    ]
+    try:
+        # Open every connection before the clock starts
+        await asyncio.gather(*(c.ping() for c in conns))
+        t0 = time.perf_counter()
+        await asyncio.gather(*(
+            _client_loop(c, cfg, thread_index * cfg["clients"] + j, total_clients, value, hists, counters, rng)
+            for j, c in enumerate(conns)
+        ))
+        elapsed = time.perf_counter() - t0
+    finally:
+        for c in conns:
+            # aclose() replaced close() in redis-py 5
+            if hasattr(c, "aclose"):
+                await c.aclose()
+            else:
+                await c.close()
+
+    return {
+        "elapsed": elapsed,
+        "counters": counters,
+        "hists": {name: h.to_dict() for name, h in hists.items()},
+    }
+
+
+def _thread_main(args):
+    cfg, thread_index = args
+    return asyncio.run(_run_thread(cfg, thread_index))
+
+
+def _op_summary(hist, ops_sec):
+    summary = hist.summary()
+    summary["ops_sec"] = ops_sec
+    return summary
+
+
+def run_benchmark(cfg):
+    """
+    Run the workload with cfg["threads"] processes, each driving cfg["clients"]
+    connections from one asyncio loop. Returns memtier-style totals with
+    throughput and p50/p99/p99.9 latency merged across all processes.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(cfg["threads"]) as pool:
+        results = pool.map(_thread_main, [(cfg, t) for t in range(cfg["threads"])])
+
+    hists = {"sets": LatencyHistogram(), "gets": LatencyHistogram()}
+    counters = {"sets": 0, "gets": 0, "hits": 0, "misses": 0, "bytes": 0}
+    rates = {"sets": 0.0, "gets": 0.0, "hits": 0.0, "misses": 0.0, "bytes": 0.0}
+    for r in results:
+        for name in hists:
+            hists[name].add(LatencyHistogram.from_dict(r["hists"][name]))
+        for name, value in r["counters"].items():
+            counters[name] += value
+            # Like memtier, throughput is the sum of each thread's own rate
+            rates[name] += value / r["elapsed"] if r["elapsed"] > 0 else 0.0
+
+    totals_hist = LatencyHistogram()
+    totals_hist.add(hists["sets"])
+    totals_hist.add(hists["gets"])
+    elapsed = max(r["elapsed"] for r in results)
+
+    totals = _op_summary(totals_hist, rates["sets"] + rates["gets"])
+    totals["hits_sec"] = rates["hits"]
+    totals["misses_sec"] = rates["misses"]
+    totals["kb_sec"] = rates["bytes"] / 1024
+    return {
+        "tool": "loadgen",
+        "elapsed_s": elapsed,
+        "requests": counters["sets"] + counters["gets"],
+        "sets": _op_summary(hists["sets"], rates["sets"]),
+        "gets": _op_summary(hists["gets"], rates["gets"]),
+        "totals": totals,
+    }
+
+
+def print_report(result):
+    print("=" * 104)
+    print(f"{'Type':<10}{'Ops/sec':>14}{'Avg. Latency':>16}{'p50 Latency':>16}"
+          f"{'p99 Latency':>16}{'p99.9 Latency':>16}{'KB/sec':>16}")
+    print("-" * 104)
+    for name, label in (("sets", "Sets"), ("gets", "Gets"), ("totals", "Totals")):
+        s = result[name]
+        kb = f"{s['kb_sec']:.2f}" if "kb_sec" in s else "---"
+        print(f"{label:<10}{s['ops_sec']:>14.2f}{s['avg_ms']:>16.5f}{s['p50_ms']:>16.5f}"
+              f"{s['p99_ms']:>16.5f}{s['p999_ms']:>16.5f}{kb:>16}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="memtier_benchmark-style load generator (asyncio + processes)")
+    parser.add_argument("-s", "--server", default="localhost", help="Server address")
+    parser.add_argument("-p", "--port", type=int, default=6379, help="Server port")
+    parser.add_argument("--protocol", default="redis", choices=["redis"], help="Only the Redis protocol is supported")
+    parser.add_argument("--key-pattern", default="R:R", help="SET:GET key pattern, R (random) or S (sequential)")
+    parser.add_argument("--key-prefix", default="memtier-", help="Key name prefix")
+    parser.add_argument("--key-minimum", type=int, default=0, help="Key ID minimum value")
+    parser.add_argument("--key-maximum", type=int, default=10_000_000, help="Key ID maximum value")
+    parser.add_argument("--data-size", type=int, default=32, help="Object data size in bytes")
+    parser.add_argument("--ratio", default="1:10", help="Set:Get ratio")
+    parser.add_argument("--threads", type=int, default=4, help="Number of worker processes")
+    parser.add_argument("--clients", type=int, default=50, help="Connections per process")
+    parser.add_argument("--requests", type=int, default=10000, help="Requests per client")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible key streams")
+    parser.add_argument("--json-out", default=None, help="Write the result as JSON to this file")
+    return parser
+
+
+def config_from_args(args):
+    return {
+        "server": args.server,
+        "port": args.port,
+        "key_pattern": parse_key_pattern(args.key_pattern),
+        "key_prefix": args.key_prefix,
+        "key_minimum": args.key_minimum,
+        "key_maximum": args.key_maximum,
+        "data_size": args.data_size,
+        "ratio": parse_ratio(args.ratio),
+        "threads": args.threads,
+        "clients": args.clients,
+        "requests": args.requests,
+        "seed": args.seed,
+    }
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cfg = config_from_args(args)
+    total = cfg["threads"] * cfg["clients"] * cfg["requests"]
+    print(f"[Loadgen] {cfg['threads']} processes x {cfg['clients']} connections x {cfg['requests']} requests "
+          f"= {total} requests against {cfg['server']}:{cfg['port']}")
+    result = run_benchmark(cfg)
+    print_report(result)
+    if args.json_out:
+        result["params"] = vars(args)
+        with open(args.json_out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[Loadgen] Result written to {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 #!/bin/bash
+# Extra memtier_benchmark flags can be appended, e.g. ./memtier_command.sh --requests=50000
+# (later flags override the defaults below). MEMTIER_BIN overrides the binary path.
+# bench_harness.py runs this script, and reads the flags below for loadgen.py and its results.
 
-/opt/redislabs/bin/memtier_benchmark \
+"${MEMTIER_BIN:-/opt/redislabs/bin/memtier_benchmark}" \
   -s re-n1 \
   -p 12000 \
   --protocol=redis \
@@ -9,4 +12,5 @@
   --ratio=1:1 \
   --threads=2 \
   --clients=10 \
-  --requests=10000
+  --requests=10000 \
+  "$@"
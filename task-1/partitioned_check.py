@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import sys
+import time
+from binascii import crc_hqx
+from collections import deque
+
+import redis
+
+from config import SOURCE_HOST, SOURCE_PORT, REPLICA_HOST, REPLICA_PORT
+from keyspace_diff import DEFAULT_SCAN_COUNT, confirm_mismatches, fetch_digests, scan_batches
+
+HASH_SLOTS = 16384
+DEFAULT_BUCKETS = 1024
+MASK64 = (1 << 64) - 1
+
+# SHA1 of each key's DUMP payload, computed server side; "" for a missing key
+DUMP_DIGEST_SCRIPT = """
+local digests = {}
+for i, key in ipairs(KEYS) do
+    local payload = redis.call('DUMP', key)
+    digests[i] = payload and redis.sha1hex(payload) or ''
+end
+return digests
+"""
+
+# Per-process state, set up by _init_worker
+_clients = {}
+_scripts = {}
+
+
+def key_slot(key: bytes):
+    """Redis Cluster hash slot (CRC16/XMODEM of the key, mod 16384)"""
+    return crc_hqx(key, 0) % HASH_SLOTS
+
+
+def key_bucket(key: bytes, buckets: int):
+    """Map a key to one of `buckets` contiguous hash-slot ranges"""
+    return key_slot(key) // (HASH_SLOTS // buckets)
+
+
+def _init_worker(source_addr, replica_addr):
+    _clients["source"] = redis.Redis(host=source_addr[0], port=source_addr[1])
+    _clients["replica"] = redis.Redis(host=replica_addr[0], port=replica_addr[1])
+    for side, client in _clients.items():
+        _scripts[side] = client.register_script(DUMP_DIGEST_SCRIPT)
+
+
+def _value_digests(side, keys):
+    """
+    Per-key digests of the DUMP payloads, computed on the server by one script
+    call per batch, so only 40 hex characters per key cross the wire. DEBUG
+    DIGEST-VALUE would do the same but is disabled by default on Redis 7+ and
+    Redis Enterprise. Missing keys come back as None.
+    """
+    return [d or None for d in _scripts[side](keys=keys)]
+
+
+def _digest_batch(task):
+    """Phase 1: fold one SCAN batch into sparse {bucket: [sum, count]} rolling digests"""
+    side, keys, buckets = task
+    partial = {}
+    for key, digest in zip(keys, _value_digests(side, keys)):
+        if digest is None:
+            continue
+        h = int.from_bytes(hashlib.blake2b(key + b"\0" + digest, digest_size=8).digest(), "big")
+        acc = partial.setdefault(key_bucket(key, buckets), [0, 0])
+        acc[0] = (acc[0] + h) & MASK64
+        acc[1] += 1
+    return side, partial
+
+
+def _diff_batch(task):
+    """Phase 2: exact per-key diff for keys that fall into mismatching buckets"""
+    side, keys, mode = task
+    source, replica = _clients["source"], _clients["replica"]
+    diffs = []
+    if side == "source":
+        suspects = []
+        for key, s, d in zip(keys, fetch_digests(source, keys, mode), fetch_digests(replica, keys, mode)):
+            if s is None:
+                continue
+            if isinstance(s, redis.ResponseError) or isinstance(d, redis.ResponseError):
+                diffs.append(("error", key))
+            elif d is None:
+                diffs.append(("missing", key))
+            elif s != d:
+                suspects.append(key)
+        if mode == "dump":
+            diffs.extend(confirm_mismatches(source, replica, suspects))
+        else:
+            diffs.extend(("mismatch", key) for key in suspects)
+    else:
+        for key, s in zip(keys, fetch_digests(source, keys, "exists")):
+            if s is None:
+                diffs.append(("extra", key))
+            elif isinstance(s, redis.ResponseError):
+                diffs.append(("error", key))
+    return diffs
+
+
+def _tasks(source, replica, scan_count, match, make_task):
+    """Interleave SCAN batches from both databases as tasks (make_task returns None to skip a batch)"""
+    iters = {"source": scan_batches(source, scan_count, match), "replica": scan_batches(replica, scan_count, match)}
+    while iters:
+        for side in list(iters):
+            try:
+                keys = next(iters[side])
+            except StopIteration:
+                del iters[side]
+                continue
+            task = make_task(side, keys)
+            if task is not None:
+                yield task
+
+
+class PartitionedChecker:
+    """
+    Multi-process consistency check between source-db and replica-db.
+
+    Phase 1 SCANs both databases and farms each key batch out to a process pool.
+    Workers have the server digest every value (a script hashing DUMP payloads),
+    then fold each key into a rolling digest (sum of per-key hashes mod 2^64 plus
+    a key count) for the hash-slot range the key belongs to. Sums are
+    order-independent, so the per-range digests of both databases can be merged
+    and compared no matter which worker saw which key.
+
+    Phase 2 rescans key names only and diffs the keys whose slot range disagreed,
+    so the exact comparison costs the keys in mismatching ranges, not the data
+    size. DUMP mismatches are confirmed value by value before being reported.
+    """
+
+    def __init__(self, source_addr, replica_addr, processes: int = None, buckets: int = DEFAULT_BUCKETS,
+                 scan_count: int = DEFAULT_SCAN_COUNT, mode: str = "dump", match=None):
+        if buckets <= 0 or HASH_SLOTS % buckets:
+            raise ValueError(f"buckets must divide {HASH_SLOTS}")
+        self.source_addr = source_addr
+        self.replica_addr = replica_addr
+        self.processes = processes or os.cpu_count() or 1
+        self.buckets = buckets
+        self.scan_count = scan_count
+        self.mode = mode
+        self.match = match
+        self.timings = {}
+
+    def _map(self, pool, worker, make_task):
+        """
+        Run worker over the SCAN batch tasks, submitted from this thread with at
+        most processes * 4 outstanding. Results come back in submission order and
+        a worker's exception is raised here.
+        """
+        source = redis.Redis(host=self.source_addr[0], port=self.source_addr[1])
+        replica = redis.Redis(host=self.replica_addr[0], port=self.replica_addr[1])
+        pending = deque()
+        try:
+            for task in _tasks(source, replica, self.scan_count, self.match, make_task):
+                pending.append(pool.apply_async(worker, (task,)))
+                if len(pending) >= self.processes * 4:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            source.close()
+            replica.close()
+
+    def range_digests(self, pool):
+        """Phase 1: return {side: ([sum] * buckets, [count] * buckets)}"""
+        totals = {side: ([0] * self.buckets, [0] * self.buckets) for side in ("source", "replica")}
+        for side, partial in self._map(pool, _digest_batch, lambda side, keys: (side, keys, self.buckets)):
+            sums, counts = totals[side]
+            for bucket, (h, n) in partial.items():
+                sums[bucket] = (sums[bucket] + h) & MASK64
+                counts[bucket] += n
+        return totals
+
+    def run(self):
+        """Return (mismatched_buckets, diffs) where diffs is a list of (kind, key)"""
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(self.processes, initializer=_init_worker, initargs=(self.source_addr, self.replica_addr)) as pool:
+            t0 = time.perf_counter()
+            totals = self.range_digests(pool)
+            src_sums, src_counts = totals["source"]
+            dst_sums, dst_counts = totals["replica"]
+            bad = {
+                b for b in range(self.buckets)
+                if src_sums[b] != dst_sums[b] or src_counts[b] != dst_counts[b]
+            }
+            self.timings["digest_s"] = time.perf_counter() - t0
+            self.timings["source_keys"] = sum(src_counts)
+            self.timings["replica_keys"] = sum(dst_counts)
+
+            diffs = []
+            if bad:
+                t1 = time.perf_counter()
+
+                def make_task(side, keys):
+                    keys = [k for k in keys if key_bucket(k, self.buckets) in bad]
+                    return (side, keys, self.mode) if keys else None
+
+                for batch in self._map(pool, _diff_batch, make_task):
+                    diffs.extend(batch)
+                self.timings["diff_s"] = time.perf_counter() - t1
+        return sorted(bad), diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash-partitioned, multi-process source-db vs replica-db check")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS,
+                        help=f"Hash-slot ranges to digest (must divide {HASH_SLOTS})")
+    parser.add_argument("--scan-count", type=int, default=DEFAULT_SCAN_COUNT, help="COUNT hint for SCAN")
+    parser.add_argument("--mode", choices=["dump", "value"], default="dump",
+                        help="How mismatching keys are compared (dump mismatches are re-checked value by value, "
+                             "since DUMP bytes depend on the RDB version and encoding)")
+    parser.add_argument("--match", default=None, help="Only check keys matching this SCAN pattern")
+    args = parser.parse_args()
+
+    checker = PartitionedChecker(
+        (SOURCE_HOST, SOURCE_PORT),
+        (REPLICA_HOST, REPLICA_PORT),
+        processes=args.processes,
+        buckets=args.buckets,
+        scan_count=args.scan_count,
+        mode=args.mode,
+        match=args.match,
+    )
+    print(f"[Check] Digesting {args.buckets} slot ranges with {checker.processes} processes...")
+    bad, diffs = checker.run()
+    t = checker.timings
+    print(f"[Check] {t['source_keys']} source keys, {t['replica_keys']} replica keys digested in {t['digest_s']:.2f}s")
+    if not bad:
+        print("[Check] All slot ranges match.")
+        return 0
+
+    print(f"[Check] {len(bad)}/{args.buckets} slot ranges differ, diffed in {t['diff_s']:.2f}s:")
+    for kind, key in diffs:
+        print(f"{kind}\t{key.decode(errors='replace')}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import random
+import time
+import uuid
+
+PROBE_KEY_PREFIX = "__replica_probe__"
+PROBE_TTL = 300
+
+
+def _replication_offsets(source, replica):
+    """
+    Return (source_offset, replica_offset) when the replica reports itself as a
+    classic Redis replica. Replica Of databases in Redis Enterprise are synced by
+    the cluster and report role:master, so None is returned for them.
+    """
+    try:
+        src = source.info("replication")
+        rep = replica.info("replication")
+    except Exception:
+        return None
+    if rep.get("role") != "slave" or "slave_repl_offset" not in rep:
+        return None
+    return src.get("master_repl_offset", 0), rep["slave_repl_offset"]
+
+
+def _sample(keys, sample_size: int):
+    keys = list(keys or [])
+    if len(keys) <= sample_size:
+        return keys
+    return random.sample(keys, sample_size)
+
+
+def wait_for_replica(source, replica, timeout: float = 30.0, sample_keys=None, sample_size: int = 50,
+                     poll_interval: float = 0.005, max_interval: float = 0.25):
+    """
+    Wait until replica-db has caught up with everything written to source-db so far.
+
+    A probe key with a unique token is written to the source after the data load;
+    the replica is caught up once it sees the token (or, for a classic replica,
+    once its replication offset reaches the source offset). A random sample of
+    sample_keys is then checked with EXISTS. Returns as soon as both hold, or at
+    the deadline, with the measured lag in milliseconds. `missing` is None when
+    the replica never caught up, since the sample was then never checked.
+    """
+    probe_key = f"{PROBE_KEY_PREFIX}:{uuid.uuid4().hex}"
+    token = str(time.time())
+    source.set(probe_key, token, ex=PROBE_TTL)
+    t0 = time.perf_counter()
+    offsets = _replication_offsets(source, replica)
+    target_offset = offsets[0] if offsets else None
+
+    sample = _sample(sample_keys, sample_size)
+    deadline = t0 + timeout
+    interval = poll_interval
+    caught_up_at = None
+    # Unchecked until the replica has caught up
+    missing = None
+    polls = 0
+
+    try:
+        while True:
+            polls += 1
+            if caught_up_at is None:
+                if target_offset is not None:
+                    offsets = _replication_offsets(source, replica)
+                    synced = offsets is not None and offsets[1] >= target_offset
+                else:
+                    synced = replica.get(probe_key) in (token, token.encode())
+                if synced:
+                    caught_up_at = time.perf_counter()
+
+            if caught_up_at is not None:
+                if missing is None:
+                    missing = sample
+                if missing:
+                    pipe = replica.pipeline(transaction=False)
+                    for key in missing:
+                        pipe.exists(key)
+                    missing = [key for key, found in zip(missing, pipe.execute()) if not found]
+                if not missing:
+                    break
+
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            time.sleep(min(interval, deadline - now))
+            interval = min(interval * 1.5, max_interval)
+    finally:
+        source.delete(probe_key)
+
+    elapsed = time.perf_counter() - t0
+    caught_up = caught_up_at is not None and not missing
+    return {
+        "caught_up": caught_up,
+        # No lag to report on a timeout: the replica has not caught up yet
+        "lag_ms": (caught_up_at - t0) * 1000 if caught_up else None,
+        "elapsed_ms": elapsed * 1000,
+        "method": "offset" if target_offset is not None else "probe-key",
+        "sampled": len(sample),
+        "missing": missing,
+        "polls": polls,
+    }
@@ -1,24 +1,74 @@
-import redis
+import argparse
+import random
+
+from bulk_loader import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONNECTIONS,
+    bulk_load,
+    make_client,
+    read_reverse,
+)
+from config import SOURCE_HOST, SOURCE_PORT, REPLICA_HOST, REPLICA_PORT
+from replication import wait_for_replica
+
+
+def positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+parser = argparse.ArgumentParser(description="Insert 1..N into source-db and read them back in reverse from replica-db")
+parser.add_argument("--count", type=int, default=100, help="Number of keys to insert (default: 100)")
+parser.add_argument("--batch-size", type=positive_int, default=DEFAULT_BATCH_SIZE, help="Keys per pipeline/MSET batch")
+parser.add_argument("--connections", type=positive_int, default=DEFAULT_CONNECTIONS, help="Parallel connections per database")
+parser.add_argument("--mode", choices=["pipeline", "mset"], default="pipeline",
+                    help="Write with pipelined SETs or MSET chunks (read back with pipelined GETs or MGET)")
+parser.add_argument("--bulk", action="store_true", help="Bulk-load mode: only print throughput, not every value")
+parser.add_argument("--repl-timeout", type=float, default=30.0, help="Max seconds to wait for replica-db to catch up")
+parser.add_argument("--probe-samples", type=int, default=50, help="Keys sampled for existence probes on replica-db")
+args = parser.parse_args()
 
 # Connect to databases
-source = redis.Redis(host='172.16.22.21', port=12000, decode_responses=True)
-replica = redis.Redis(host='172.16.22.22', port=13000, decode_responses=True)
+source = make_client(SOURCE_HOST, SOURCE_PORT, args.connections)
+replica = make_client(REPLICA_HOST, REPLICA_PORT, args.connections)
+
+# Insert values 1-N into source-db
+print(f"Inserting values 1-{args.count} into source-db...")
+stats = bulk_load(source, 1, args.count, args.batch_size, args.connections, mode=args.mode)
+print(f"Insert completed! {stats['keys']} keys in {stats['seconds']:.2f}s ({stats['keys_per_sec']:.0f} keys/sec)")
+
+# Wait until replica-db has caught up instead of sleeping for a fixed time
+sample_keys = []
+if args.count > 0:
+    sample_keys = [str(random.randint(1, args.count)) for _ in range(args.probe_samples)] + [str(args.count)]
+repl = wait_for_replica(
+    source,
+    replica,
+    timeout=args.repl_timeout,
+    sample_keys=sample_keys,
+    sample_size=args.probe_samples + 1,
+)
+if repl["caught_up"]:
+    print(f"[Replication] replica-db caught up, lag {repl['lag_ms']:.1f} ms "
+          f"({repl['method']}, {repl['sampled']} sampled keys present)")
+elif repl["missing"] is None:
+    print(f"[Replication][WARN] Timed out after {repl['elapsed_ms']:.0f} ms: replica-db never caught up "
+          f"({repl['method']}), sampled keys not checked")
+else:
+    print(f"[Replication][WARN] Timed out after {repl['elapsed_ms']:.0f} ms waiting for replica-db, "
+          f"{len(repl['missing'])}/{repl['sampled']} sampled keys missing")
 
-# Insert values 1-100 into source-db
-print("Inserting values 1-100 into source-db...")
-for i in range(1, 101):
-    source.set(str(i), i)  # Atau gunakan f"key:{i}" sebagai key
-    if i % 10 == 0:
-        print(f"Inserted {i} keys...")
 
-print("Insert completed!")
+def print_values(pairs):
+    for i, value in pairs:
+        print(f"Key: {i}, Value: {value}")
 
-# Wait for replication (optional but recommended)
-import time
-time.sleep(2)
 
 # Read and print in reverse order from replica-db
 print("\nReading values in reverse order from replica-db:")
-for i in range(100, 0, -1):
-    value = replica.get(str(i))
-    print(f"Key: {i}, Value: {value}")
\ No newline at end of file
+stats = read_reverse(replica, 1, args.count, args.batch_size, args.connections, mode=args.mode,
+                     on_batch=None if args.bulk else print_values)
+print(f"Read completed! {stats['keys']} keys in {stats['seconds']:.2f}s ({stats['keys_per_sec']:.0f} keys/sec), "
+      f"{stats['missing']} missing")
@@ -1,4 +1,7 @@
-BASE_URL = "https://re-cluster1.ps-redislabs.org:9443"
+import os
+
+# RE_BASE_URL overrides the cluster, e.g. to run against task-2/mock_server.py
+BASE_URL = os.environ.get("RE_BASE_URL", "https://re-cluster1.ps-redislabs.org:9443")
 USERNAME = "admin@rl.org"
 PASSWORD = "9Ng2OSr"
 
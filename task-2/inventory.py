@@ -0,0 +1,139 @@
+import re
+import threading
+import time
+
+DEFAULT_TTL = 30
+
+# collection -> (list endpoint, indexed fields)
+COLLECTIONS = {
+    "bdbs": ("/v1/bdbs", ("uid", "name")),
+    "roles": ("/v1/roles", ("uid", "name")),
+    "users": ("/v1/users", ("uid", "name", "email")),
+    "acl_rules": ("/v1/acl_rules", ("uid", "name", "rule")),
+    "modules": ("/v1/modules", ("uid", "module_name")),
+}
+
+_WRITE_PATH = re.compile(r"^/v1/(" + "|".join(COLLECTIONS) + r")(?:/(\d+))?/?$")
+
+
+class Inventory:
+    """
+    Cached, indexed view of the cluster's bdbs, roles, users, acl_rules and modules.
+
+    Each collection is fetched once with a single list call and indexed by uid,
+    name and (for users) email, so lookups are dict hits instead of an API call plus
+    a linear scan. Entries expire after `ttl` seconds. The inventory also listens to
+    the RestClient: successful POST/PUT responses are upserted and DELETEs removed
+    in place, so the client's own writes never force a reload.
+
+    A failed list call (non-200) reads as an empty collection, like the per-call
+    lookups it replaces, and is retried on the next access. With strict=True it
+    raises instead (the reconciler must not mistake an error for "nothing exists").
+    """
+
+    def __init__(self, client, ttl: float = DEFAULT_TTL, strict: bool = False):
+        self.client = client
+        self.ttl = ttl
+        self.strict = strict
+        self._lock = threading.RLock()
+        self._items = {}
+        self._indexes = {}
+        self._loaded_at = {}
+        client.add_listener(self._on_response)
+
+    def _load(self, collection):
+        path, fields = COLLECTIONS[collection]
+        r = self.client.get(path)
+        if self.strict:
+            r.raise_for_status()
+        ok = r.status_code == 200
+        if not ok:
+            print(f"[Inventory][WARN] GET {path} returned {r.status_code}, treating {collection} as empty")
+        with self._lock:
+            self._items[collection] = {}
+            self._indexes[collection] = {f: {} for f in fields}
+            for obj in r.json() if ok else []:
+                self._add(collection, obj)
+            if ok:
+                self._loaded_at[collection] = time.monotonic()
+
+    def _add(self, collection, obj):
+        items = self._items[collection]
+        if obj.get("uid") in items:
+            self._drop(collection, obj["uid"])
+        items[obj.get("uid")] = obj
+        for field, index in self._indexes[collection].items():
+            if field in obj:
+                index.setdefault(obj[field], []).append(obj)
+
+    def _drop(self, collection, uid):
+        obj = self._items[collection].pop(uid, None)
+        if obj is None:
+            return
+        for field, index in self._indexes[collection].items():
+            matches = index.get(obj.get(field))
+            if matches:
+                matches[:] = [o for o in matches if o is not obj]
+                if not matches:
+                    del index[obj.get(field)]
+
+    def _ensure(self, collection, refresh=False):
+        with self._lock:
+            loaded_at = self._loaded_at.get(collection)
+            fresh = loaded_at is not None and time.monotonic() - loaded_at < self.ttl
+        if refresh or not fresh:
+            self._load(collection)
+
+    def all(self, collection, refresh=False):
+        """Every object of a collection"""
+        self._ensure(collection, refresh)
+        with self._lock:
+            return list(self._items[collection].values())
+
+    def find_all(self, collection, refresh=False, **criteria):
+        """Objects matching one indexed field, e.g. find_all("modules", module_name="search")"""
+        (field, value), = criteria.items()
+        self._ensure(collection, refresh)
+        with self._lock:
+            return list(self._indexes[collection][field].get(value, []))
+
+    def find(self, collection, refresh=False, **criteria):
+        """First object matching one indexed field, e.g. find("bdbs", name="exam-db"), or None"""
+        matches = self.find_all(collection, refresh, **criteria)
+        return matches[0] if matches else None
+
+    def upsert(self, collection, obj):
+        with self._lock:
+            if collection in self._items:
+                self._add(collection, obj)
+
+    def remove(self, collection, uid):
+        with self._lock:
+            if collection in self._items:
+                self._drop(collection, uid)
+
+    def invalidate(self, collection=None):
+        """Force a reload of one collection (or all) on next access"""
+        with self._lock:
+            for name in [collection] if collection else list(self._loaded_at):
+                self._loaded_at.pop(name, None)
+
+    def _on_response(self, method, path, response):
+        m = _WRITE_PATH.match(path.split("?", 1)[0])
+        if not m or method == "GET" or response.status_code >= 400:
+            return
+        collection, uid = m.group(1), m.group(2)
+        if method == "DELETE" and uid:
+            self.remove(collection, int(uid))
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if isinstance(body, dict) and "uid" in body:
+            with self._lock:
+                # A PUT may return a partial object; merge it over what we already have
+                current = self._items.get(collection, {}).get(body["uid"])
+            self.upsert(collection, {**current, **body} if current else body)
+        else:
+            self.invalidate(collection)
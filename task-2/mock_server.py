@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ACL_RULES = [
+    {"uid": 1, "name": "Full Access", "rule": "+@all ~*"},
+    {"uid": 2, "name": "Not Dangerous", "rule": "+@all -@dangerous ~*"},
+    {"uid": 3, "name": "Read Only", "rule": "+@read ~*"},
+]
+
+DEFAULT_MODULES = [
+    {"uid": "8f1c2b7e", "module_name": "search", "semantic_version": "2.8.15", "min_redis_version": "7.2"},
+    {"uid": "d2e4a9c1", "module_name": "search", "semantic_version": "2.10.5", "min_redis_version": "7.4"},
+    {"uid": "47b0ef12", "module_name": "ReJSON", "semantic_version": "2.8.4", "min_redis_version": "7.2"},
+]
+
+DEFAULT_REDIS_VERSIONS = ["7.2", "7.4"]
+
+_PATH = re.compile(r"^/v1/(bdbs|roles|users|acl_rules|modules|redis_versions)(?:/(\d+))?/?$")
+_UNIQUE = {"bdbs": "name", "roles": "name", "users": "email"}
+
+
+class MockCluster:
+    """
+    In-memory state and behaviour of a Redis Enterprise cluster's REST API.
+
+    - latency: seconds added to every request, a number or a (min, max) range
+    - conflict_rate: probability that a PUT is rejected with 409 (a concurrent update)
+    - pending_time: seconds a new BDB stays "pending" before it turns "active";
+      PUTs on a pending BDB get 409, like a busy database on a real cluster
+    - delete_time: seconds a deleted object stays visible before it is gone
+    """
+
+    def __init__(self, latency=0.0, conflict_rate: float = 0.0, pending_time: float = 0.0,
+                 delete_time: float = 0.0, redis_versions=None, seed=None):
+        self.latency = latency
+        self.conflict_rate = conflict_rate
+        self.pending_time = pending_time
+        self.delete_time = delete_time
+        self.redis_versions = list(redis_versions or DEFAULT_REDIS_VERSIONS)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.uids = itertools.count(1)
+        self.objects = {
+            "bdbs": {},
+            "roles": {1: {"uid": 1, "name": "Admin", "management": "admin"}},
+            "users": {1: {"uid": 1, "name": "Admin", "email": "admin@rl.org", "role_uids": [1]}},
+        }
+        next(self.uids)
+        self.deleted_at = {}
+        self.counters = {"requests": 0, "conflicts": 0}
+
+    def _sleep(self):
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            latency = self.rng.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def _visible(self, collection, uid):
+        gone_at = self.deleted_at.get((collection, uid))
+        if gone_at is not None and time.monotonic() >= gone_at:
+            self.objects[collection].pop(uid, None)
+            del self.deleted_at[(collection, uid)]
+        return self.objects[collection].get(uid)
+
+    def _view(self, collection, obj):
+        obj = dict(obj)
+        if collection == "bdbs":
+            obj["status"] = "pending" if time.monotonic() < obj.pop("_active_at") else "active"
+        obj.pop("password", None)
+        return obj
+
+    def _conflict(self):
+        if self.conflict_rate and self.rng.random() < self.conflict_rate:
+            self.counters["conflicts"] += 1
+            return True
+        return False
+
+    def handle(self, method, path, body):
+        """Return (status, json_body) for one request"""
+        self._sleep()
+        with self.lock:
+            self.counters["requests"] += 1
+            m = _PATH.match(path.split("?", 1)[0])
+            if not m:
+                return 404, {"error_code": "not_found", "description": f"No such endpoint {path}"}
+            collection, uid = m.group(1), int(m.group(2)) if m.group(2) else None
+
+            if collection == "acl_rules":
+                return 200, DEFAULT_ACL_RULES
+            if collection == "modules":
+                return 200, DEFAULT_MODULES
+            if collection == "redis_versions":
+                return 200, [{"version": v} for v in self.redis_versions]
+
+            store = self.objects[collection]
+            if uid is None:
+                if method == "GET":
+                    return 200, [
+                        self._view(collection, o) for u, o in list(store.items()) if self._visible(collection, u)
+                    ]
+                if method == "POST":
+                    return self._create(collection, body or {})
+                return 405, {"error_code": "method_not_allowed"}
+
+            obj = self._visible(collection, uid)
+            if obj is None:
+                return 404, {"error_code": f"{collection[:-1]}_not_found", "description": f"uid {uid} not found"}
+            if method == "GET":
+                return 200, self._view(collection, obj)
+            if method == "PUT":
+                if self._conflict() or (collection == "bdbs" and time.monotonic() < obj["_active_at"]):
+                    return 409, {"error_code": "db_busy", "description": "Object is busy, try again later"}
+                obj.update({k: v for k, v in (body or {}).items() if k != "uid"})
+                return 200, self._view(collection, obj)
+            if method == "DELETE":
+                if (collection, uid) not in self.deleted_at:
+                    self.deleted_at[(collection, uid)] = time.monotonic() + self.delete_time
+                    self._visible(collection, uid)
+                return 200, {}
+            return 405, {"error_code": "method_not_allowed"}
+
+    def _create(self, collection, body):
+        unique = _UNIQUE[collection]
+        if any(o.get(unique) == body.get(unique) for u, o in list(self.objects[collection].items())
+               if self._visible(collection, u)):
+            return 409, {"error_code": f"{collection[:-1]}_already_exists", "description": f"{unique} in use"}
+        if collection == "bdbs" and body.get("redis_version"):
+            versions = self.redis_versions
+            if not any(v == body["redis_version"] or v.startswith(body["redis_version"] + ".")
+                       or body["redis_version"].startswith(v + ".") for v in versions):
+                return 400, {"error_code": "invalid_version", "description": "Unsupported redis_version"}
+
+        uid = next(self.uids)
+        obj = {**body, "uid": uid}
+        if collection == "bdbs":
+            obj.setdefault("port", 10000 + uid)
+            obj.setdefault("roles_permissions", [])
+            obj["_active_at"] = time.monotonic() + self.pending_time
+        if collection == "users":
+            obj.setdefault("role_uids", [])
+        self.objects[collection][uid] = obj
+        return 200, self._view(collection, obj)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs add ~40ms per call
+    disable_nagle_algorithm = True
+
+    def _dispatch(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        status, payload = self.server.cluster.handle(self.command, self.path, body)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+    def log_message(self, *args):
+        pass
+
+
+class MockServer:
+    """
+    Serve a MockCluster over plain HTTP on localhost from a background thread.
+    Point a RestClient at server.base_url (or set RE_BASE_URL for the scripts).
+    """
+
+    def __init__(self, cluster=None, host: str = "127.0.0.1", port: int = 0):
+        self.cluster = cluster or MockCluster()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.cluster = self.cluster
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def tenant_spec(tenants: int):
+    """Generated provisioning batch: one BDB, two roles and two users per tenant"""
+    spec = {"bdbs": [], "roles": [], "users": []}
+    for t in range(tenants):
+        db = f"tenant-{t}-db"
+        spec["bdbs"].append({"name": db, "memory_size": 104857600})
+        for kind, acl in (("viewer", "+@read -@write"), ("member", "+@all")):
+            role = f"tenant-{t}-{kind}"
+            spec["roles"].append({"name": role, "bdb": db, "acl": acl, "management": f"db_{kind}"})
+            spec["users"].append({"email": f"{kind}@tenant-{t}.example.com", "name": f"{kind} {t}", "roles": [role]})
+    return spec
+
+
+def bench_provisioning(tenants: int, concurrency_levels, **cluster_opts):
+    """Provision `tenants` tenants against a fresh mock per concurrency level and print timings"""
+    from provision import Provisioner
+    from rest_client import RestClient
+
+    print(f"[Mock] Provisioning {tenants} tenants, cluster options {cluster_opts}")
+    print(f"{'Concurrency':>12}{'Seconds':>10}{'Calls':>8}{'Conflicts':>11}{'Failures':>10}")
+    for concurrency in concurrency_levels:
+        with MockServer(MockCluster(**cluster_opts)) as server:
+            client = RestClient(server.base_url, "admin@rl.org", "x", pool_size=max(10, concurrency), retries=0)
+            provisioner = Provisioner(client, concurrency=concurrency)
+            t0 = time.perf_counter()
+            failures = asyncio.run(provisioner.run(tenant_spec(tenants)))
+            elapsed = time.perf_counter() - t0
+            c = server.cluster.counters
+            print(f"{concurrency:>12}{elapsed:>10.2f}{c['requests']:>8}{c['conflicts']:>11}{len(failures):>10}")
+            client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Redis Enterprise REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9443)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--conflict-rate", type=float, default=0.0, help="Probability of a 409 on PUT")
+    parser.add_argument("--pending-time", type=float, default=0.0, help="Seconds before a new BDB is active")
+    parser.add_argument("--delete-time", type=float, default=0.0, help="Seconds a deleted object stays visible")
+    parser.add_argument("--bench-tenants", type=int, default=0,
+                        help="Instead of serving, benchmark provision.py with this many tenants")
+    parser.add_argument("--concurrency", default="1,4,16", help="Concurrency levels for --bench-tenants")
+    args = parser.parse_args()
+
+    opts = {
+        "latency": args.latency,
+        "conflict_rate": args.conflict_rate,
+        "pending_time": args.pending_time,
+        "delete_time": args.delete_time,
+    }
+    if args.bench_tenants:
+        bench_provisioning(args.bench_tenants, [int(c) for c in args.concurrency.split(",")], **opts)
+        return
+
+    server = MockServer(MockCluster(**opts), args.host, args.port)
+    print(f"[Mock] Serving Redis Enterprise REST mock on {server.base_url} (Ctrl+C to stop)")
+    print(f"[Mock] Run the scripts against it with RE_BASE_URL={server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from waiters import backoff_delays
+
+DEFAULT_MAX_ATTEMPTS = 6
+
+
+def find_acl_uid(acl_rules, redis_acl):
+    """Pick the ACL rule UID matching an ACL string (defaults to 1, 'Full Access')"""
+    for rule in acl_rules:
+        # Match by exact ACL string or specific keywords for role names
+        if rule.get("rule") == redis_acl:
+            return rule["uid"]
+        elif "+@read" in redis_acl and "read" in rule.get("name", "").lower():
+            return rule["uid"]
+    return 1
+
+
+def management_for_role(role_name):
+    """Cluster management level derived from the role name"""
+    return "db_member" if "member" in role_name else "db_viewer"
+
+
+class PermissionBatcher:
+    """
+    Collects role -> ACL links per BDB and applies each BDB's links in one PUT.
+
+    roles_permissions can only be changed by rewriting the whole list, so linking N
+    roles one by one costs N GET+PUT cycles that conflict with each other. Here
+    links are queued with add() and flush() does a single read-modify-write per
+    BDB. Only 409 responses are retried, after re-reading the BDB, with jittered
+    exponential backoff; any other error is raised.
+    """
+
+    def __init__(self, client, max_attempts: int = DEFAULT_MAX_ATTEMPTS, **backoff):
+        self.client = client
+        self.max_attempts = max_attempts
+        self.backoff = {"initial": 0.5, "max_interval": 8.0, **backoff}
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def add(self, bdb_uid, role_uid, acl_uid):
+        """Queue a link; a later add() for the same role and BDB replaces the ACL"""
+        with self._lock:
+            self._pending.setdefault(bdb_uid, {})[role_uid] = acl_uid
+
+    def take(self, bdb_uid):
+        """Remove and return the queued {role_uid: acl_uid} links of one BDB"""
+        with self._lock:
+            return self._pending.pop(bdb_uid, {})
+
+    def write_links(self, bdb_uid, links):
+        """
+        One read-modify-write of the BDB's roles_permissions. Returns the number of
+        links written (0 if all present), or None when the PUT got 409.
+        """
+        r_db = self.client.get(f"/v1/bdbs/{bdb_uid}")
+        r_db.raise_for_status()
+        current = r_db.json().get("roles_permissions", [])
+        existing = {p.get("role_uid"): p.get("redis_acl_uid") for p in current}
+        missing = {role: acl for role, acl in links.items() if existing.get(role) != acl}
+        if not missing:
+            return 0
+
+        perms = [p for p in current if p.get("role_uid") not in missing]
+        perms += [{"role_uid": role, "redis_acl_uid": acl} for role, acl in missing.items()]
+        r = self.client.put(f"/v1/bdbs/{bdb_uid}", json={"roles_permissions": perms})
+        if r.status_code == 409:
+            return None
+        r.raise_for_status()
+        return len(missing)
+
+    def flush_bdb(self, bdb_uid):
+        """Apply all queued links of one BDB; returns the number of links written (0 if all present)"""
+        links = self.take(bdb_uid)
+        if not links:
+            return 0
+        delays = backoff_delays(**self.backoff)
+        for attempt in range(1, self.max_attempts + 1):
+            written = self.write_links(bdb_uid, links)
+            if written is not None:
+                return written
+            if attempt < self.max_attempts:
+                delay = next(delays)
+                print(f"[Link] DB {bdb_uid} is busy (409), retrying in {delay:.1f}s "
+                      f"(attempt {attempt}/{self.max_attempts})")
+                time.sleep(delay)
+        raise RuntimeError(f"Failed to link {len(links)} roles to DB {bdb_uid} after {self.max_attempts} attempts (409)")
+
+    def flush(self):
+        """Apply every queued link, one PUT per BDB; returns {bdb_uid: links written}"""
+        with self._lock:
+            bdbs = list(self._pending)
+        return {bdb_uid: self.flush_bdb(bdb_uid) for bdb_uid in bdbs}
@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from config import BASE_URL, USERNAME, PASSWORD, HEADERS
+from permissions import PermissionBatcher, find_acl_uid, management_for_role
+from rest_client import RestClient
+from waiters import async_wait_until, backoff_delays
+
+DEFAULT_CONCURRENCY = 8
+
+
+def load_spec(path: str):
+    """
+    Load a provisioning batch from JSON (or YAML when PyYAML is installed):
+
+    {
+      "bdbs":  [{"name": "tenant-a-db", "memory_size": 1073741824, ...}],
+      "roles": [{"name": "tenant-a-viewer", "bdb": "tenant-a-db", "acl": "+@read -@write"}],
+      "users": [{"email": "a@example.com", "name": "A", "roles": ["tenant-a-viewer"]}]
+    }
+
+    Extra BDB keys are passed to POST /v1/bdbs as-is. A role's "management"
+    defaults to the level derived from its name; users may also list plain
+    "role_uids" for roles that already exist (e.g. 1 for Admin).
+    """
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    for section in ("bdbs", "roles", "users"):
+        spec.setdefault(section, [])
+    return spec
+
+
+class Provisioner:
+    """
+    Concurrent provisioning engine for a declarative batch of BDBs, roles and users.
+
+    Every object gets its own asyncio task. Tasks await the tasks they depend on
+    (user -> role, a BDB's role links -> its roles + the active BDB), so
+    independent objects are created side by side while dependent ones start as
+    soon as their inputs are ready. All role links of one BDB are applied in a
+    single update through a PermissionBatcher. REST calls run on the shared
+    pooled RestClient in worker threads, at most `concurrency` at a time; 409
+    backoff waits happen on the event loop, without holding a slot. Each step is
+    recorded on a timeline.
+    """
+
+    def __init__(self, client, concurrency: int = DEFAULT_CONCURRENCY, ready_timeout: float = 300):
+        self.client = client
+        self.concurrency = concurrency
+        self.ready_timeout = ready_timeout
+        self.timeline = []
+
+    async def _call(self, method, path, **kwargs):
+        async with self._sem:
+            r = await asyncio.to_thread(self.client.request, method, path, **kwargs)
+        return r
+
+    async def _list(self, path):
+        r = await self._call("GET", path)
+        r.raise_for_status()
+        return r.json()
+
+    async def _step(self, kind, name, coro):
+        start = time.perf_counter() - self._t0
+        status = "ok"
+        try:
+            return await coro
+        except Exception as e:
+            status = f"error: {e}"
+            raise
+        finally:
+            self.timeline.append({
+                "kind": kind,
+                "name": name,
+                "start_s": start,
+                "end_s": time.perf_counter() - self._t0,
+                "status": status,
+            })
+
+    async def _wait_bdb_active(self, uid):
+        async def active():
+            r = await self._call("GET", f"/v1/bdbs/{uid}")
+            return r.status_code == 200 and r.json().get("status") == "active"
+
+        await async_wait_until(active, self.ready_timeout, f"bdb {uid}")
+
+    async def _create_bdb(self, spec):
+        name = spec["name"]
+        existing = self._bdbs.get(name)
+        if existing:
+            uid = existing["uid"]
+        else:
+            payload = {"type": "redis", "shards_count": 1, "replication": False, **spec}
+            r = await self._step("create", f"bdb {name}", self._call("POST", "/v1/bdbs", json=payload))
+            r.raise_for_status()
+            uid = r.json()["uid"]
+        await self._step("wait", f"bdb {name}", self._wait_bdb_active(uid))
+        return uid
+
+    async def _create_role(self, spec):
+        name = spec["name"]
+        existing = self._roles.get(name)
+        if existing:
+            return existing["uid"]
+        payload = {"name": name, "management": spec.get("management") or management_for_role(name)}
+        r = await self._step("create", f"role {name}", self._call("POST", "/v1/roles", json=payload))
+        r.raise_for_status()
+        return r.json()["uid"]
+
+    async def _link_bdb(self, bdb_name, role_specs):
+        if bdb_name in self._bdb_tasks:
+            bdb_uid = await self._bdb_tasks[bdb_name]
+        elif bdb_name in self._bdbs:
+            # A BDB that already exists on the cluster but is not in the spec
+            bdb_uid = self._bdbs[bdb_name]["uid"]
+        else:
+            raise ValueError(f"bdb {bdb_name!r} is neither in the spec nor on the cluster")
+        for spec in role_specs:
+            role_uid = await self._role_tasks[spec["name"]]
+            self._batcher.add(bdb_uid, role_uid, find_acl_uid(self._acl_rules, spec.get("acl", "")))
+
+        # All roles of one BDB go out in a single roles_permissions update
+        async def link():
+            links = self._batcher.take(bdb_uid)
+            if not links:
+                return 0
+            delays = backoff_delays(**self._batcher.backoff)
+            for attempt in range(1, self._batcher.max_attempts + 1):
+                async with self._sem:
+                    written = await asyncio.to_thread(self._batcher.write_links, bdb_uid, links)
+                if written is not None:
+                    return written
+                if attempt < self._batcher.max_attempts:
+                    # Back off outside the semaphore so other calls can use the slot
+                    await asyncio.sleep(next(delays))
+            raise RuntimeError(f"Failed to link {len(links)} roles to bdb {bdb_name} "
+                               f"after {self._batcher.max_attempts} attempts (409)")
+
+        await self._step("link", f"{len(role_specs)} roles -> bdb {bdb_name}", link())
+
+    async def _create_user(self, spec):
+        email = spec["email"]
+        role_uids = list(spec.get("role_uids", []))
+        for role_name in spec.get("roles", []):
+            role_uids.append(await self._role_tasks[role_name])
+        if email in self._users:
+            return self._users[email]["uid"]
+        payload = {
+            "email": email,
+            "name": spec.get("name", email),
+            "password": spec.get("password", "TempPass123!"),
+            "role_uids": role_uids,
+        }
+        r = await self._step("create", f"user {email}", self._call("POST", "/v1/users", json=payload))
+        r.raise_for_status()
+        return r.json()["uid"]
+
+    async def run(self, spec):
+        """Provision the whole batch; returns the list of (object, exception) failures"""
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._batcher = PermissionBatcher(self.client)
+        self._t0 = time.perf_counter()
+
+        bdbs, roles, users, acl_rules = await self._step("load", "inventory", asyncio.gather(
+            self._list("/v1/bdbs"), self._list("/v1/roles"), self._list("/v1/users"), self._list("/v1/acl_rules"),
+        ))
+        self._bdbs = {b["name"]: b for b in bdbs}
+        self._roles = {r["name"]: r for r in roles}
+        self._users = {u["email"]: u for u in users}
+        self._acl_rules = acl_rules
+
+        self._bdb_tasks = {b["name"]: asyncio.create_task(self._create_bdb(b)) for b in spec["bdbs"]}
+        self._role_tasks = {r["name"]: asyncio.create_task(self._create_role(r)) for r in spec["roles"]}
+        roles_by_bdb = {}
+        for r in spec["roles"]:
+            if r.get("bdb"):
+                roles_by_bdb.setdefault(r["bdb"], []).append(r)
+        link_tasks = {
+            f"links -> bdb {bdb_name}": asyncio.create_task(self._link_bdb(bdb_name, specs))
+            for bdb_name, specs in roles_by_bdb.items()
+        }
+        user_tasks = {f"user {u['email']}": asyncio.create_task(self._create_user(u)) for u in spec["users"]}
+
+        named = {
+            **{f"bdb {k}": t for k, t in self._bdb_tasks.items()},
+            **{f"role {k}": t for k, t in self._role_tasks.items()},
+            **link_tasks,
+            **user_tasks,
+        }
+        results = await asyncio.gather(*named.values(), return_exceptions=True)
+        return [(name, r) for name, r in zip(named, results) if isinstance(r, BaseException)]
+
+    def print_timeline(self, width: int = 40):
+        if not self.timeline:
+            return
+        total = max(s["end_s"] for s in self.timeline) or 1
+        print("\n" + "=" * 100)
+        print(f"{'Start':>8}{'Dur':>8}  {'Step':<7}{'Object':<40}Timeline")
+        print("-" * 100)
+        for s in sorted(self.timeline, key=lambda s: s["start_s"]):
+            lo = int(s["start_s"] / total * width)
+            hi = max(lo + 1, int(s["end_s"] / total * width))
+            bar = " " * lo + "#" * (hi - lo)
+            mark = "" if s["status"] == "ok" else f"  [{s['status']}]"
+            print(f"{s['start_s']:>7.2f}s{s['end_s'] - s['start_s']:>7.2f}s  {s['kind']:<7}{s['name'][:39]:<40}"
+                  f"|{bar:<{width}}|{mark}")
+        print(f"Total: {total:.2f}s for {len(self.timeline)} steps")
+        print("=" * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision a batch of BDBs, roles and users concurrently")
+    parser.add_argument("spec", help="JSON/YAML batch file (see tenants.example.json)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Max REST calls in flight")
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec)
+    client = RestClient(BASE_URL, USERNAME, PASSWORD, headers=HEADERS, pool_size=max(10, args.concurrency))
+    provisioner = Provisioner(client, concurrency=args.concurrency)
+    print(f"[Provision] {len(spec['bdbs'])} databases, {len(spec['roles'])} roles, {len(spec['users'])} users "
+          f"(concurrency {args.concurrency})...")
+    try:
+        failures = asyncio.run(provisioner.run(spec))
+    finally:
+        provisioner.print_timeline()
+        client.close()
+
+    for name, err in failures:
+        print(f"[ERROR] {name}: {err}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+import argparse
+import sys
+import time
+
+from config import BASE_URL, USERNAME, PASSWORD, HEADERS
+from inventory import Inventory
+from permissions import find_acl_uid, management_for_role
+from provision import load_spec
+from rest_client import RestClient
+from waiters import backoff_delays, wait_bdb_active
+
+# Defaults used only when a BDB is created; never diffed against the live object
+BDB_CREATE_DEFAULTS = {"type": "redis", "shards_count": 1, "replication": False}
+
+MAX_CONFLICT_RETRIES = 6
+
+# Spec keys that are not object fields
+_ROLE_KEYS = ("bdb", "acl")
+_USER_KEYS = ("email", "password", "roles")
+
+
+def diff_fields(desired: dict, live: dict):
+    """
+    Fields of `desired` whose value differs from `live`. Fields the API does not
+    echo back are treated as create-only and never diffed, so they cannot cause a
+    PUT on every run.
+    """
+    return {k: v for k, v in desired.items() if k in live and live[k] != v}
+
+
+class Reconciler:
+    """
+    Drive the cluster to a desired state (same spec format as provision.py) with
+    the fewest writes.
+
+    The live state is read once through the inventory (one GET per collection).
+    Missing objects are POSTed, drifted ones get a PUT with only the differing
+    fields, and each BDB's roles_permissions is rewritten in a single PUT only if
+    its set of (role, ACL) links differs. Links of roles declared in the spec are
+    authoritative; links of other roles are preserved. Objects are only deleted
+    with prune_prefix set, and only when their name (or email) starts with it.
+    Nothing is deleted and recreated just to make a run idempotent.
+    """
+
+    def __init__(self, client, inventory, dry_run: bool = False, prune_prefix: str = None,
+                 ready_timeout: float = 300):
+        self.client = client
+        self.inventory = inventory
+        self.dry_run = dry_run
+        self.prune_prefix = prune_prefix
+        self.ready_timeout = ready_timeout
+        self.actions = []
+        self.pruned_roles = set()
+
+    def _write(self, method, path, payload, description, refresh=None):
+        """
+        Issue one write (only recorded with dry_run). A PUT that gets 409 is retried
+        with backoff; refresh(), if given, is called before every retry to rebuild
+        the payload from a fresh read, and returning None means nothing is left to write.
+        """
+        self.actions.append((method, path, description))
+        print(f"[Reconcile] {method:<6} {path:<22} {description}")
+        if self.dry_run:
+            return {}
+        delays = backoff_delays(initial=0.5, max_interval=8.0)
+        for attempt in range(1, MAX_CONFLICT_RETRIES + 1):
+            r = self.client.request(method, path, json=payload)
+            # A busy object (409) on update is worth retrying; anything else is final
+            if r.status_code != 409 or method != "PUT" or attempt == MAX_CONFLICT_RETRIES:
+                break
+            time.sleep(next(delays))
+            if refresh:
+                payload = refresh()
+                if payload is None:
+                    return {}
+        if r.status_code >= 400:
+            print(f"[Reconcile][ERROR] {r.status_code}: {r.text}")
+        r.raise_for_status()
+        try:
+            return r.json()
+        except ValueError:
+            return {}
+
+    def _prunable(self, name):
+        return bool(self.prune_prefix) and bool(name) and name.startswith(self.prune_prefix)
+
+    def reconcile_bdbs(self, specs):
+        uids, created = {}, []
+        for spec in specs:
+            live = self.inventory.find("bdbs", name=spec["name"])
+            if not live:
+                body = self._write("POST", "/v1/bdbs", {**BDB_CREATE_DEFAULTS, **spec}, f"create bdb {spec['name']}")
+                uids[spec["name"]] = body.get("uid", f"<new bdb {spec['name']}>")
+                created.append(uids[spec["name"]])
+                continue
+            uids[spec["name"]] = live["uid"]
+            changes = diff_fields(spec, live)
+            if changes:
+                self._write("PUT", f"/v1/bdbs/{live['uid']}", changes, f"update bdb {spec['name']}: {sorted(changes)}")
+
+        wanted = {s["name"] for s in specs}
+        for live in self.inventory.all("bdbs"):
+            if live["name"] not in wanted and self._prunable(live["name"]):
+                self._write("DELETE", f"/v1/bdbs/{live['uid']}", None, f"delete bdb {live['name']}")
+
+        if not self.dry_run:
+            for uid in created:
+                wait_bdb_active(self.client, uid, self.ready_timeout)
+        return uids
+
+    def reconcile_roles(self, specs):
+        uids = {}
+        for spec in specs:
+            desired = {k: v for k, v in spec.items() if k not in _ROLE_KEYS}
+            desired.setdefault("management", management_for_role(spec["name"]))
+            live = self.inventory.find("roles", name=spec["name"])
+            if not live:
+                body = self._write("POST", "/v1/roles", desired, f"create role {spec['name']}")
+                uids[spec["name"]] = body.get("uid", f"<new role {spec['name']}>")
+                continue
+            uids[spec["name"]] = live["uid"]
+            changes = diff_fields(desired, live)
+            if changes:
+                self._write("PUT", f"/v1/roles/{live['uid']}", changes, f"update role {spec['name']}: {sorted(changes)}")
+
+        wanted = {s["name"] for s in specs}
+        for live in self.inventory.all("roles"):
+            if live["name"] not in wanted and self._prunable(live["name"]):
+                self._write("DELETE", f"/v1/roles/{live['uid']}", None, f"delete role {live['name']}")
+                self.pruned_roles.add(live["uid"])
+        return uids
+
+    def reconcile_links(self, specs, bdb_uids, role_uids):
+        acl_rules = self.inventory.all("acl_rules")
+        # Links of pruned roles are managed too: they must not be written back
+        managed = {role_uids[s["name"]] for s in specs} | self.pruned_roles
+        desired_by_bdb = {}
+        for spec in specs:
+            if spec.get("bdb"):
+                link = {"role_uid": role_uids[spec["name"]], "redis_acl_uid": find_acl_uid(acl_rules, spec.get("acl", ""))}
+                desired_by_bdb.setdefault(spec["bdb"], []).append(link)
+
+        # Every BDB that should have, or currently has, a link of a managed role
+        targets = {name: bdb_uids.get(name) for name in desired_by_bdb}
+        for live in self.inventory.all("bdbs"):
+            if any(p.get("role_uid") in managed for p in live.get("roles_permissions", [])):
+                targets.setdefault(live["name"], live["uid"])
+
+        as_set = lambda ps: {(p.get("role_uid"), p.get("redis_acl_uid")) for p in ps}
+
+        def links_payload(current, desired):
+            """roles_permissions with managed links replaced, or None if current already matches"""
+            perms = [p for p in current if p.get("role_uid") not in managed] + desired
+            return {"roles_permissions": perms} if as_set(perms) != as_set(current) else None
+
+        for bdb_name, bdb_uid in targets.items():
+            live = self.inventory.find("bdbs", name=bdb_name) or {}
+            desired = desired_by_bdb.get(bdb_name, [])
+            payload = links_payload(live.get("roles_permissions", []), desired)
+            if payload is None:
+                continue
+
+            def refresh(bdb_uid=bdb_uid, desired=desired):
+                # Re-read the BDB so links added concurrently by someone else are kept
+                r = self.client.get(f"/v1/bdbs/{bdb_uid}")
+                r.raise_for_status()
+                return links_payload(r.json().get("roles_permissions", []), desired)
+
+            self._write("PUT", f"/v1/bdbs/{bdb_uid}", payload,
+                        f"set {len(payload['roles_permissions'])} role links on bdb {bdb_name}", refresh)
+
+    def reconcile_users(self, specs, role_uids):
+        for spec in specs:
+            desired = {k: v for k, v in spec.items() if k not in _USER_KEYS}
+            desired["role_uids"] = sorted(
+                list(spec.get("role_uids", [])) + [role_uids[name] for name in spec.get("roles", [])],
+                key=str,
+            )
+            live = self.inventory.find("users", email=spec["email"])
+            if not live:
+                payload = {"email": spec["email"], "password": spec.get("password", "TempPass123!"), **desired}
+                self._write("POST", "/v1/users", payload, f"create user {spec['email']}")
+                continue
+            changes = diff_fields(desired, {**live, "role_uids": sorted(live.get("role_uids", []), key=str)})
+            if changes:
+                self._write("PUT", f"/v1/users/{live['uid']}", changes, f"update user {spec['email']}: {sorted(changes)}")
+
+        wanted = {s["email"] for s in specs}
+        for live in self.inventory.all("users"):
+            if live["email"] not in wanted and self._prunable(live["email"]):
+                self._write("DELETE", f"/v1/users/{live['uid']}", None, f"delete user {live['email']}")
+
+    def run(self, spec):
+        """Reconcile the whole spec; returns the list of (method, path, description) writes"""
+        bdb_uids = self.reconcile_bdbs(spec["bdbs"])
+        role_uids = self.reconcile_roles(spec["roles"])
+        self.reconcile_links(spec["roles"], bdb_uids, role_uids)
+        self.reconcile_users(spec["users"], role_uids)
+        return self.actions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile the cluster against a desired-state spec")
+    parser.add_argument("spec", help="JSON/YAML desired state (same format as provision.py)")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the writes that would be issued")
+    parser.add_argument("--prune-prefix", default=None,
+                        help="Delete bdbs/roles/users missing from the spec whose name/email starts with this prefix")
+    args = parser.parse_args()
+
+    client = RestClient(BASE_URL, USERNAME, PASSWORD, headers=HEADERS)
+    reconciler = Reconciler(client, Inventory(client, strict=True), dry_run=args.dry_run, prune_prefix=args.prune_prefix)
+    try:
+        actions = reconciler.run(load_spec(args.spec))
+        verb = "planned" if args.dry_run else "issued"
+        print(f"[Reconcile] {len(actions)} writes {verb}." if actions else "[Reconcile] Cluster already matches the spec.")
+    finally:
+        client.print_stats()
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
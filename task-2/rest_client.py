@@ -0,0 +1,147 @@
+import re
+import threading
+import time
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+import tracing
+
+# Disable SSL warnings for cleaner output in exam environment
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+DEFAULT_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+}
+
+
+def endpoint_template(path: str):
+    """/v1/bdbs/12 -> /v1/bdbs/{uid}, so latency is grouped per endpoint"""
+    return re.sub(r"/\d+(?=/|$)", "/{uid}", path.split("?", 1)[0])
+
+
+class RestClient:
+    """
+    Redis Enterprise REST API client on top of one pooled requests.Session.
+
+    Auth, TLS verification, timeouts and retries are configured once; every call
+    reuses a keep-alive connection from the pool instead of paying a new TLS
+    handshake. Retries only cover connection errors and 502/503/504 on idempotent
+    methods (GET/PUT/DELETE); 409 conflicts are left to the caller. Each call is
+    timed and counted per endpoint, see stats() / print_stats(), and recorded as
+    an "http" span when tracing is enabled (see tracing.py).
+
+    Listeners added with add_listener() are called as fn(method, path, response)
+    after every completed call (used e.g. by the inventory cache to follow writes).
+    """
+
+    def __init__(self, base_url: str, username: str, password: str, headers=None, timeout: float = 30,
+                 retries: int = 3, backoff_factor: float = 0.3, pool_size: int = 10, verify: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(username, password)
+        self.session.verify = verify
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "PUT", "DELETE", "HEAD", "OPTIONS"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._listeners = []
+
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+
+    def request(self, method: str, path: str, **kwargs):
+        """Send a request to base_url + path and return the requests.Response"""
+        kwargs.setdefault("timeout", self.timeout)
+        key = (method.upper(), endpoint_template(path))
+        t0 = time.perf_counter()
+        error = False
+        try:
+            with tracing.span(f"{key[0]} {key[1]}", "http", path=path) as span:
+                r = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+                span["status"] = r.status_code
+                span["bytes_out"] = len(r.request.body or b"")
+                span["bytes_in"] = len(r.content)
+            error = r.status_code >= 400
+            for fn in self._listeners:
+                fn(method.upper(), path, r)
+            return r
+        except requests.RequestException:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                s = self._stats.setdefault(key, {"calls": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0})
+                s["calls"] += 1
+                s["errors"] += int(error)
+                s["total_s"] += elapsed
+                s["max_s"] = max(s["max_s"], elapsed)
+
+    def get(self, path: str, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, json=None, **kwargs):
+        return self.request("POST", path, json=json, **kwargs)
+
+    def put(self, path: str, json=None, **kwargs):
+        return self.request("PUT", path, json=json, **kwargs)
+
+    def delete(self, path: str, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def stats(self):
+        """Per-endpoint latency counters, slowest total first"""
+        with self._lock:
+            rows = [
+                {
+                    "method": method,
+                    "endpoint": endpoint,
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "total_ms": s["total_s"] * 1000,
+                    "avg_ms": s["total_s"] * 1000 / s["calls"],
+                    "max_ms": s["max_s"] * 1000,
+                }
+                for (method, endpoint), s in self._stats.items()
+            ]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def print_stats(self):
+        rows = self.stats()
+        if not rows:
+            return
+        print("\n" + "=" * 86)
+        print(f"{'Method':<8}{'Endpoint':<34}{'Calls':>7}{'Errors':>8}{'Avg ms':>10}{'Max ms':>10}{'Total ms':>9}")
+        print("-" * 86)
+        for r in rows:
+            print(f"{r['method']:<8}{r['endpoint']:<34}{r['calls']:>7}{r['errors']:>8}"
+                  f"{r['avg_ms']:>10.1f}{r['max_ms']:>10.1f}{r['total_ms']:>9.0f}")
+        print("=" * 86)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,141 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_active = None
+
+
+class Tracer:
+    """
+    Collects timed spans (REST calls, wait loops, provisioning steps) in memory
+    and exports them as JSON lines or Chrome trace format (chrome://tracing,
+    Perfetto). Timestamps are relative to the tracer's creation.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self.spans = []
+
+    @contextmanager
+    def span(self, name: str, category: str = "step", **attrs):
+        """Time the enclosed block; the yielded dict can be used to add attributes"""
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs.setdefault("error", repr(e))
+            raise
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.spans.append({
+                    "name": name,
+                    "cat": category,
+                    "start_ms": (start - self.t0) * 1000,
+                    "dur_ms": (end - start) * 1000,
+                    "tid": threading.get_ident(),
+                    "attrs": attrs,
+                })
+
+    def export_jsonl(self, path: str):
+        with open(path, "w") as f:
+            for s in self.spans:
+                f.write(json.dumps(s, default=str) + "\n")
+
+    def export_chrome(self, path: str):
+        events = [
+            {
+                "name": s["name"],
+                "cat": s["cat"],
+                "ph": "X",
+                "ts": s["start_ms"] * 1000,
+                "dur": s["dur_ms"] * 1000,
+                "pid": self.pid,
+                "tid": s["tid"],
+                "args": s["attrs"],
+            }
+            for s in self.spans
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+
+    def export(self, path: str):
+        """Export by file extension: .jsonl -> JSON lines, anything else -> Chrome trace"""
+        if path.endswith(".jsonl"):
+            self.export_jsonl(path)
+        else:
+            self.export_chrome(path)
+
+    def print_summary(self, top: int = 10):
+        """Slowest individual spans, then total time per span name"""
+        if not self.spans:
+            return
+        print("\n" + "=" * 92)
+        print(f"Slowest {min(top, len(self.spans))} spans")
+        print(f"{'Start ms':>10}{'Dur ms':>10}  {'Category':<10}{'Name':<48}{'Status':>8}")
+        print("-" * 92)
+        for s in sorted(self.spans, key=lambda s: s["dur_ms"], reverse=True)[:top]:
+            status = s["attrs"].get("status", "ERR" if "error" in s["attrs"] else "")
+            print(f"{s['start_ms']:>10.1f}{s['dur_ms']:>10.1f}  {s['cat']:<10}{s['name'][:47]:<48}{status!s:>8}")
+
+        totals = {}
+        for s in self.spans:
+            t = totals.setdefault((s["cat"], s["name"]), [0, 0.0])
+            t[0] += 1
+            t[1] += s["dur_ms"]
+        print("-" * 92)
+        print(f"{'Count':>10}{'Total ms':>10}  {'Category':<10}Name")
+        for (cat, name), (count, total) in sorted(totals.items(), key=lambda kv: kv[1][1], reverse=True)[:top]:
+            print(f"{count:>10}{total:>10.1f}  {cat:<10}{name}")
+        print("=" * 92)
+
+
+def enable():
+    """Start collecting spans process-wide and return the tracer"""
+    global _active
+    _active = Tracer()
+    return _active
+
+
+def enable_from_env(var: str = "RE_TRACE"):
+    """Enable tracing when the environment variable names an output file"""
+    return enable() if os.environ.get(var) else None
+
+
+def finish(tracer, var: str = "RE_TRACE"):
+    """Print the summary and export to the file named by the environment variable"""
+    if tracer is None:
+        return
+    tracer.print_summary()
+    path = os.environ.get(var)
+    if path:
+        tracer.export(path)
+        print(f"[Trace] {len(tracer.spans)} spans written to {path}")
+
+
+@contextmanager
+def span(name: str, category: str = "step", **attrs):
+    """Span on the active tracer, or a no-op when tracing is not enabled"""
+    if _active is None:
+        yield attrs
+        return
+    with _active.span(name, category, **attrs) as a:
+        yield a
+
+
+def traced(name: str = None, category: str = "step"):
+    """Decorator: wrap every call of the function in a span"""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name or fn.__name__, category):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,114 @@
+import asyncio
+import random
+import time
+
+import tracing
+
+DEFAULT_INITIAL = 0.25
+DEFAULT_FACTOR = 1.7
+DEFAULT_MAX_INTERVAL = 5.0
+DEFAULT_JITTER = 0.2
+
+
+def backoff_delays(initial: float = DEFAULT_INITIAL, factor: float = DEFAULT_FACTOR,
+                   max_interval: float = DEFAULT_MAX_INTERVAL, jitter: float = DEFAULT_JITTER):
+    """Endless exponential backoff delays, each randomized by +/- jitter (a fraction)"""
+    delay = initial
+    while True:
+        yield delay * random.uniform(1 - jitter, 1 + jitter)
+        delay = min(delay * factor, max_interval)
+
+
+def _log_ready(label, elapsed, polls):
+    if label:
+        print(f"[Wait] {label} ready after {elapsed:.2f}s ({polls} polls)")
+
+
+def wait_until(check, timeout: float = 60, label: str = "", **backoff):
+    """
+    Call check() until it returns a truthy value and return that value.
+    Polls start fast and back off exponentially with jitter, so short waits finish
+    almost immediately and long ones put little load on the API. Raises
+    TimeoutError after `timeout` seconds. Time-to-ready is logged under `label`.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    with tracing.span(f"wait {label or 'condition'}", "wait", polls=0) as span:
+        for delay in backoff_delays(**backoff):
+            span["polls"] += 1
+            result = check()
+            if result:
+                _log_ready(label, time.monotonic() - start, span["polls"])
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"{label or 'Condition'} not ready after {timeout}s ({span['polls']} polls)")
+            time.sleep(min(delay, remaining))
+
+
+async def async_wait_until(check, timeout: float = 60, label: str = "", **backoff):
+    """asyncio flavour of wait_until; check is a coroutine function"""
+    start = time.monotonic()
+    deadline = start + timeout
+    with tracing.span(f"wait {label or 'condition'}", "wait", polls=0) as span:
+        for delay in backoff_delays(**backoff):
+            span["polls"] += 1
+            result = await check()
+            if result:
+                _log_ready(label, time.monotonic() - start, span["polls"])
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"{label or 'Condition'} not ready after {timeout}s ({span['polls']} polls)")
+            await asyncio.sleep(min(delay, remaining))
+
+
+def action_uid_of(response):
+    """Return the action_uid of an asynchronous cluster operation, if the response carries one"""
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    return body.get("action_uid") if isinstance(body, dict) else None
+
+
+def wait_action(client, action_uid, timeout: float = 120, label: str = ""):
+    """Wait for a cluster action (/v1/actions/<uid>) to complete; raises if it fails"""
+
+    def check():
+        r = client.get(f"/v1/actions/{action_uid}")
+        if r.status_code == 404:
+            # Finished actions are eventually purged
+            return {"status": "completed"}
+        action = r.json()
+        if action.get("status") in ("failed", "cancelled"):
+            raise RuntimeError(f"Action {action_uid} {action['status']}: {action.get('error', '')}")
+        return action if action.get("status") == "completed" else None
+
+    return wait_until(check, timeout, label or f"action {action_uid}")
+
+
+def wait_bdb_active(client, uid, timeout: float = 60, label: str = ""):
+    """Poll the single /v1/bdbs/<uid> endpoint until the database is active; returns the BDB"""
+
+    def check():
+        r = client.get(f"/v1/bdbs/{uid}")
+        if r.status_code != 200:
+            return None
+        bdb = r.json()
+        return bdb if bdb.get("status") == "active" else None
+
+    return wait_until(check, timeout, label or f"bdb {uid}")
+
+
+def wait_deleted(client, path: str, timeout: float = 60, label: str = "", response=None):
+    """
+    Wait until GET <path> returns 404. When the DELETE response carries an
+    action_uid, the action is followed instead of polling the resource.
+    """
+    if response is not None:
+        action_uid = action_uid_of(response)
+        if action_uid:
+            wait_action(client, action_uid, timeout, label)
+            return True
+    return wait_until(lambda: client.get(path).status_code == 404, timeout, label or f"delete {path}")
@@ -0,0 +1,156 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from redis import Redis
+from redisvl.index import SearchIndex
+from redisvl.query import VectorQuery
+
+from semantic_router import REDIS_URL, ROUTES, build_schema, model
+
+BENCH_PREFIX = "hnsw-bench"
+LOAD_CHUNK_SIZE = 1000
+
+
+def _csv_ints(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def load_catalog(path):
+    """Route catalog: {route_name: [sentences]} from a JSON file, or ROUTES"""
+    if not path:
+        return ROUTES
+    with open(path) as f:
+        return json.load(f)
+
+
+def make_vectors(catalog, count: int, queries: int, noise: float, seed: int = 0):
+    """
+    Embed the catalog once and grow it to `count` vectors (plus `queries` query
+    vectors) by perturbing references, so the benchmark can run at catalog sizes
+    well beyond the real one. With noise=0 and count <= catalog size the real
+    embeddings are used as is.
+    """
+    sentences = [(name, s) for name, refs in catalog.items() for s in refs]
+    base = np.asarray(model.encode([s for _, s in sentences], batch_size=64, convert_to_numpy=True), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+
+    def sample(n):
+        picks = rng.integers(0, len(base), n) if n > len(base) or noise else np.arange(n)
+        vectors = base[picks] + noise * rng.standard_normal((n, base.shape[1])).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return [sentences[i][0] for i in picks], vectors
+
+    names, vectors = sample(count)
+    _, query_vectors = sample(queries)
+    return names, vectors, query_vectors
+
+
+def load_vectors(client, names, vectors, prefix: str = BENCH_PREFIX, dtype: str = "float32"):
+    for start in range(0, len(vectors), LOAD_CHUNK_SIZE):
+        pipe = client.pipeline(transaction=False)
+        for i in range(start, min(start + LOAD_CHUNK_SIZE, len(vectors))):
+            embedding = vectors[i].astype(dtype).tobytes()
+            pipe.hset(f"{prefix}:{i}", mapping={"route_name": names[i], "embedding": embedding})
+        pipe.execute()
+
+
+def delete_vectors(client, prefix: str = BENCH_PREFIX):
+    keys = list(client.scan_iter(match=f"{prefix}:*", count=1000))
+    for start in range(0, len(keys), LOAD_CHUNK_SIZE):
+        client.delete(*keys[start:start + LOAD_CHUNK_SIZE])
+
+
+def build_index(index_schema, timeout: float = 1800):
+    """Create an index over the already loaded vectors and wait until indexing finishes; returns (index, seconds)"""
+    index = SearchIndex(index_schema, redis_url=REDIS_URL)
+    t0 = time.perf_counter()
+    index.create(overwrite=True)
+    while time.perf_counter() - t0 < timeout:
+        info = index.info()
+        if int(info.get("indexing", 0)) == 0 and float(info.get("percent_indexed", 1)) >= 1:
+            break
+        time.sleep(0.1)
+    return index, time.perf_counter() - t0
+
+
+def run_queries(index, query_vectors, k: int, ef_runtime=None, dtype: str = "float32"):
+    """Top-k ids per query and per-query latencies in ms"""
+    ids, latencies = [], []
+    for v in query_vectors:
+        q = VectorQuery(vector=v, vector_field_name="embedding", return_fields=["route_name"],
+                        num_results=k, ef_runtime=ef_runtime, dtype=dtype)
+        t0 = time.perf_counter()
+        results = index.query(q)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        ids.append({r["id"] for r in results})
+    return ids, np.asarray(latencies)
+
+
+def recall(truth, found):
+    return float(np.mean([len(t & f) / len(t) if t else 1.0 for t, f in zip(truth, found)]))
+
+
+def index_memory_mb(index):
+    info = index.info()
+    return float(info.get("vector_index_sz_mb", 0) or 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency of HNSW parameter settings against a flat index")
+    parser.add_argument("--catalog", help="JSON route catalog {route: [sentences]} (default: embeddings/routes.py)")
+    parser.add_argument("--vectors", type=int, default=20000, help="Indexed vectors (catalog grown by perturbation)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.05, help="Perturbation used to grow the catalog")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours compared for recall@k")
+    parser.add_argument("--m", type=_csv_ints, default=[8, 16, 32], help="HNSW M values")
+    parser.add_argument("--ef-construction", type=_csv_ints, default=[100, 200], help="HNSW EF_CONSTRUCTION values")
+    parser.add_argument("--ef-runtime", type=_csv_ints, default=[10, 50, 100, 200], help="HNSW EF_RUNTIME values")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark keys and indexes")
+    args = parser.parse_args()
+
+    client = Redis.from_url(REDIS_URL)
+    names, vectors, query_vectors = make_vectors(load_catalog(args.catalog), args.vectors, args.queries, args.noise)
+    print(f"[Bench] Loading {len(vectors)} vectors under {BENCH_PREFIX}:*")
+    load_vectors(client, names, vectors)
+
+    rows, indexes = [], []
+    try:
+        flat, build_s = build_index(build_schema("flat", name=f"{BENCH_PREFIX}-flat", prefix=BENCH_PREFIX))
+        indexes.append(flat)
+        truth, lat = run_queries(flat, query_vectors, args.k)
+        rows.append(("flat", "-", "-", "-", 1.0, lat, build_s, index_memory_mb(flat)))
+
+        for m in args.m:
+            for efc in args.ef_construction:
+                name = f"{BENCH_PREFIX}-hnsw-m{m}-efc{efc}"
+                index, build_s = build_index(build_schema("hnsw", name=name, prefix=BENCH_PREFIX,
+                                                          m=m, ef_construction=efc))
+                indexes.append(index)
+                memory = index_memory_mb(index)
+                for ef in args.ef_runtime:
+                    found, lat = run_queries(index, query_vectors, args.k, ef_runtime=ef)
+                    rows.append(("hnsw", m, efc, ef, recall(truth, found), lat, build_s, memory))
+                print(f"[Bench] {name} done")
+    finally:
+        if not args.keep:
+            for index in indexes:
+                index.delete(drop=False)
+            delete_vectors(client)
+        client.close()
+
+    print("\n" + "=" * 90)
+    print(f"{len(vectors)} vectors, {len(query_vectors)} queries, recall@{args.k} against flat")
+    print(f"{'Algo':<6}{'M':>5}{'EF_C':>7}{'EF_RT':>7}{'Recall':>9}{'p50 ms':>9}{'p99 ms':>9}{'Build s':>10}{'Index MB':>10}")
+    print("-" * 90)
+    for algo, m, efc, ef, rec, lat, build_s, memory in rows:
+        print(f"{algo:<6}{m!s:>5}{efc!s:>7}{ef!s:>7}{rec:>9.4f}{np.percentile(lat, 50):>9.2f}"
+              f"{np.percentile(lat, 99):>9.2f}{build_s:>10.1f}{memory:>10.1f}")
+    print("=" * 90)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+from redis import Redis
+
+from bench_hnsw import build_index, delete_vectors, index_memory_mb, load_catalog, load_vectors, make_vectors, \
+    recall, run_queries
+from quantized import QuantizedSearch
+from semantic_router import REDIS_URL, build_schema
+
+BENCH_PREFIX = "quant-bench"
+
+
+def exact_neighbours(vectors, query_vectors, k):
+    """Ground truth: exact float32 cosine top-k row ids per query"""
+    sims = query_vectors @ vectors.T
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    return [set(row.tolist()) for row in top]
+
+
+def redis_rows(ids):
+    """Redis document ids (<prefix>:<row>) back to row numbers"""
+    return [{int(i.rsplit(":", 1)[1]) for i in found} for found in ids]
+
+
+def bench_redis(client, names, vectors, query_vectors, truth, k, dtype):
+    prefix = f"{BENCH_PREFIX}-{dtype}"
+    load_vectors(client, names, vectors, prefix, dtype)
+    index = None
+    try:
+        index, _ = build_index(build_schema("flat", name=f"{prefix}-index", prefix=prefix, datatype=dtype))
+        found, lat = run_queries(index, query_vectors, k, dtype=dtype)
+        memory = index_memory_mb(index) * 1024 * 1024 / len(vectors)
+        return (f"redis flat {dtype}", memory, recall(truth, redis_rows(found)), lat)
+    finally:
+        if index is not None:
+            index.delete(drop=False)
+        delete_vectors(client, prefix)
+
+
+def bench_local(vectors, query_vectors, truth, k, kind, candidates, subspaces):
+    t0 = time.perf_counter()
+    options = {"subspaces": subspaces} if kind == "pq" else {}
+    search = QuantizedSearch(vectors, kind, candidates=candidates, **options)
+    build_s = time.perf_counter() - t0
+    found, latencies = [], []
+    for q in query_vectors:
+        t0 = time.perf_counter()
+        rows, _ = search.search(q[None, :], k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        found.append(set(rows[0].tolist()))
+    label = f"{kind} prefilter + f32 rerank (c={candidates}, build {build_s:.1f}s)"
+    return (label, search.bytes_per_vector(), recall(truth, found), np.asarray(latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory, recall and latency of reduced-precision route vectors")
+    parser.add_argument("--catalog", help="JSON route catalog {route: [sentences]} (default: embeddings/routes.py)")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=64, help="Prefilter candidates reranked in float32")
+    parser.add_argument("--subspaces", type=int, default=48, help="PQ subspaces (bytes per vector)")
+    parser.add_argument("--skip-redis", action="store_true", help="Only benchmark the in-process prefilters")
+    args = parser.parse_args()
+
+    names, vectors, query_vectors = make_vectors(load_catalog(args.catalog), args.vectors, args.queries, args.noise)
+    truth = exact_neighbours(vectors, query_vectors, args.k)
+
+    rows = []
+    if not args.skip_redis:
+        client = Redis.from_url(REDIS_URL)
+        try:
+            for dtype in ("float32", "float16"):
+                rows.append(bench_redis(client, names, vectors, query_vectors, truth, args.k, dtype))
+                print(f"[Bench] {rows[-1][0]} done")
+        finally:
+            client.close()
+    for kind in ("int8", "pq"):
+        rows.append(bench_local(vectors, query_vectors, truth, args.k, kind, args.candidates, args.subspaces))
+        print(f"[Bench] {kind} done")
+
+    print("\n" + "=" * 100)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(query_vectors)} queries, "
+          f"recall@{args.k} against exact float32")
+    print(f"{'Storage':<56}{'Bytes/vec':>11}{'Recall':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    print("-" * 100)
+    for label, per_vector, rec, lat in rows:
+        print(f"{label:<56}{per_vector:>11.0f}{rec:>9.4f}{np.percentile(lat, 50):>9.3f}{np.percentile(lat, 99):>9.3f}")
+    print("=" * 100)
+    print("Redis bytes/vector is the vector index size over the vector count; in-process rows count only the codes.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from encoder import BACKENDS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a fresh interpreter so every phase is a real cold start
+_PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import semantic_router
+t_import = time.perf_counter()
+semantic_router.build_schema()
+t_schema = time.perf_counter()
+encoder = semantic_router._load_model()
+t_model = time.perf_counter()
+encoder.encode(["warm up"])
+t_first = time.perf_counter()
+references = [r for refs in semantic_router.ROUTES.values() for r in refs]
+encoder.encode(references, batch_size=64)
+t_batch = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t_import - t0) * 1000,
+    "schema_ms": (t_schema - t_import) * 1000,
+    "model_load_ms": (t_model - t_schema) * 1000,
+    "first_encode_ms": (t_first - t_model) * 1000,
+    "batch_encode_ms": (t_batch - t_first) * 1000,
+    "total_ms": (t_batch - t0) * 1000,
+}))
+"""
+
+PHASES = ("import_ms", "schema_ms", "model_load_ms", "first_encode_ms", "batch_encode_ms", "total_ms")
+
+
+def probe(backend: str):
+    env = {**os.environ, "ENCODER_BACKEND": backend, "EMBEDDING_CACHE_DIR": ""}
+    out = subprocess.run([sys.executable, "-c", _PROBE], cwd=HERE, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"{backend} probe failed: {out.stderr.strip().splitlines()[-1:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time of semantic_router.py per encoder backend")
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8",
+                        help=f"Comma separated, any of {', '.join(BACKENDS)}")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts per backend (median is reported)")
+    args = parser.parse_args()
+
+    rows = []
+    for backend in args.backends.split(","):
+        # First run warms the local model directory (download/export) and is not counted
+        try:
+            probe(backend)
+            runs = [probe(backend) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"[Bench][WARN] {e}")
+            continue
+        rows.append((backend, {p: statistics.median(r[p] for r in runs) for p in PHASES}))
+        print(f"[Bench] {backend} done")
+
+    print("\n" + "=" * 88)
+    print(f"Median of {args.runs} cold starts, milliseconds")
+    print(f"{'Backend':<12}{'Import':>10}{'Schema':>10}{'Model load':>12}{'1st encode':>12}{'30 refs':>10}{'Total':>10}")
+    print("-" * 88)
+    for backend, m in rows:
+        print(f"{backend:<12}{m['import_ms']:>10.0f}{m['schema_ms']:>10.0f}{m['model_load_ms']:>12.0f}"
+              f"{m['first_encode_ms']:>12.0f}{m['batch_encode_ms']:>10.0f}{m['total_ms']:>10.0f}")
+    print("=" * 88)
+    return 0 if rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
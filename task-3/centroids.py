@@ -0,0 +1,79 @@
+import numpy as np
+
+DEFAULT_MARGIN = 0.05
+KMEANS_ITERATIONS = 20
+
+
+def normalize(matrix):
+    """Rows scaled to unit length (as float32), so dot products are cosine similarities"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def spherical_kmeans(vectors, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0):
+    """k unit-length prototypes of `vectors` under cosine similarity"""
+    vectors = normalize(vectors)
+    if k >= len(vectors):
+        return vectors
+    rng = np.random.default_rng(seed)
+    centers = vectors[rng.choice(len(vectors), k, replace=False)]
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centers.T, axis=1)
+        updated = np.stack([
+            vectors[assign == c].sum(axis=0) if np.any(assign == c) else centers[c] for c in range(k)
+        ])
+        updated = normalize(updated)
+        if np.allclose(updated, centers):
+            break
+        centers = updated
+    return centers
+
+
+class CentroidRouter:
+    """
+    In-process router over one normalized centroid (or k spherical k-means
+    prototypes) per route. Routing is a single matrix product against a
+    (routes x prototypes) matrix; a route scores its best prototype. A match is
+    only trusted when the best route beats the runner-up by at least `margin`
+    in cosine similarity, otherwise the caller should fall back to the KNN
+    search over every reference.
+    """
+
+    def __init__(self, route_embeddings: dict, prototypes: int = 1, margin: float = DEFAULT_MARGIN):
+        self.margin = margin
+        self.routes = list(route_embeddings)
+        matrices, owners = [], []
+        for r, name in enumerate(self.routes):
+            vectors = np.asarray(route_embeddings[name], dtype=np.float32)
+            centers = normalize(vectors.mean(axis=0, keepdims=True)) if prototypes <= 1 \
+                else spherical_kmeans(vectors, prototypes)
+            matrices.append(centers)
+            owners += [r] * len(centers)
+        self.matrix = np.concatenate(matrices)
+        self.owners = np.asarray(owners)
+        self.stats = {"fast": 0, "fallback": 0}
+
+    def route(self, embeddings):
+        """One {"route", "distance", "margin"} per embedding; route is None when the margin is too small"""
+        sims = normalize(embeddings) @ self.matrix.T
+        # Best prototype per route, then best and runner-up route
+        per_route = np.full((len(sims), len(self.routes)), -np.inf, dtype=np.float32)
+        np.maximum.at(per_route, (slice(None), self.owners), sims)
+        if len(self.routes) > 1:
+            top2 = np.partition(per_route, -2, axis=1)[:, -2:]
+            margins = top2[:, 1] - top2[:, 0]
+        else:
+            margins = np.full(len(sims), np.inf, dtype=np.float32)
+        best = np.argmax(per_route, axis=1)
+
+        matches = []
+        for i, r in enumerate(best):
+            confident = margins[i] >= self.margin
+            matches.append({
+                "route": self.routes[r] if confident else None,
+                "distance": float(1 - per_route[i, r]),
+                "margin": float(margins[i]),
+            })
+            self.stats["fast" if confident else "fallback"] += 1
+        return matches
@@ -1,5 +1,8 @@
 # Redis Enterprise API Configuration for Task 3
-BASE_URL = "https://re-cluster1.ps-redislabs.org:9443"
+import os
+
+# RE_BASE_URL overrides the cluster, e.g. to run against task-2/mock_server.py
+BASE_URL = os.environ.get("RE_BASE_URL", "https://re-cluster1.ps-redislabs.org:9443")
 USERNAME = "admin@rl.org"
 PASSWORD = "9Ng2OSr"
 
@@ -11,3 +14,15 @@ HEADERS = {
 # These will be used for connecting to the Redis DB once created
 REDIS_HOST = "172.16.22.23"
 REDIS_PW = ""  # For simplicity, unauthenticated access is allowed
+
+# Persistent embedding cache for semantic_router.py (set to "" to disable)
+EMBEDDING_CACHE_DIR = os.environ.get(
+    "EMBEDDING_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "embeddings")
+)
+
+# Encoder backend for semantic_router.py: "torch", "onnx" or "onnx-int8" (quantized CPU)
+ENCODER_BACKEND = os.environ.get("ENCODER_BACKEND", "torch")
+# Local model directory, pre-warmed on first run so later starts never contact the Hub ("" = default HF cache)
+MODEL_CACHE_DIR = os.environ.get(
+    "MODEL_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "models")
+)
@@ -1,23 +1,23 @@
 import json
 import os
 import sys
-import time
 import tempfile
 from urllib.parse import urlparse
 
-import requests
-
 from config import BASE_URL, USERNAME, PASSWORD, HEADERS
 
-import urllib3
-
-# Suppress warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# Shared REST client lives in task-2 (appended so this folder's config.py wins)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "task-2"))
+from inventory import Inventory
+from rest_client import RestClient
+from tracing import enable_from_env, finish, traced
+from waiters import wait_deleted, wait_until
 
 # Update headers to include Accept
 HEADERS["Accept"] = "application/json"
 
-auth = (USERNAME, PASSWORD)
+client = RestClient(BASE_URL, USERNAME, PASSWORD, headers=HEADERS)
+inventory = Inventory(client)
 
 TARGET_REDIS_VERSION = "7.4.0"
 DB_NAME = "semantic-db"
@@ -40,30 +40,29 @@ def _is_version_compatible(module_info, target_version: str):
         return min_v <= target <= max_v
     return min_v <= target
 
-def check_available_modules():
-    """Discover available modules on the cluster"""
+@traced()
+def check_available_modules(module_name: str = "search"):
+    """Discover available modules with the given name on the cluster"""
     print("[Task 3] Checking available modules on cluster...")
-    r = requests.get(f"{BASE_URL}/v1/modules", auth=auth, verify=False, timeout=30)
-    if r.status_code == 200:
-        return r.json()
-    return []
+    return inventory.find_all("modules", module_name=module_name)
 
-def _fetch_redis_versions(url: str):
-    r = requests.get(url, auth=auth, verify=False, timeout=30)
+def _fetch_redis_versions(path: str):
+    r = client.get(path)
     if r.status_code == 200:
         return r.json()
-    print(f"[Task 3][DEBUG] redis_versions endpoint {url} -> {r.status_code}: {r.text}")
+    print(f"[Task 3][DEBUG] redis_versions endpoint {path} -> {r.status_code}: {r.text}")
     return None
 
+@traced()
 def get_available_redis_versions():
     """Fetch available Redis versions from the cluster"""
     candidates = [
-        f"{BASE_URL}/v1/redis_versions",
-        f"{BASE_URL}/v1/redis-versions",
-        f"{BASE_URL}/v1/redis/versions",
+        "/v1/redis_versions",
+        "/v1/redis-versions",
+        "/v1/redis/versions",
     ]
-    for url in candidates:
-        data = _fetch_redis_versions(url)
+    for path in candidates:
+        data = _fetch_redis_versions(path)
         if data is not None:
             return data
     return []
@@ -134,6 +133,7 @@ def _build_candidate_versions(selected_version: str, target_version: str):
     candidates.append(None)
     return candidates
 
+@traced()
 def create_search_db():
     """Create a single shard DB with Search and Query enabled"""
     modules = check_available_modules()
@@ -150,17 +150,14 @@ def create_search_db():
     module_uid = None
     for m in modules:
         # Search for module named 'search' and compatible with 7.4.0
-        if m.get("module_name") == "search" and _is_version_compatible(m, redis_version):
+        if _is_version_compatible(m, redis_version):
             module_uid = m.get("uid")
             print(f"[Task 3] Found Search Module compatible with {redis_version} (UID: {module_uid})")
             break
     
     # Fallback to any 'search' module if 7.4 specific not found
-    if not module_uid:
-        for m in modules:
-            if m.get("module_name") == "search":
-                module_uid = m.get("uid")
-                break
+    if not module_uid and modules:
+        module_uid = modules[0].get("uid")
 
     if not module_uid:
         raise Exception("Search module (RediSearch) not found in cluster modules list.")
@@ -189,14 +186,13 @@ def create_search_db():
             print(f"[Task 3] Creating Database '{DB_NAME}' using Redis {version} and module 'search' (UID: {module_uid})...")
         else:
             print(f"[Task 3] Creating Database '{DB_NAME}' using server default Redis version and module 'search' (UID: {module_uid})...")
-        r = requests.post(f"{BASE_URL}/v1/bdbs", json=payload, headers=HEADERS, auth=auth, verify=False, timeout=30)
+        r = client.post("/v1/bdbs", json=payload)
 
         if r.status_code == 409:
             print("[Task 3] Database already exists. Fetching info...")
-            r_list = requests.get(f"{BASE_URL}/v1/bdbs", auth=auth, verify=False, timeout=30)
-            for db in r_list.json():
-                if db["name"] == DB_NAME:
-                    return db["uid"], db["port"]
+            db = inventory.find("bdbs", refresh=True, name=DB_NAME)
+            if db:
+                return db["uid"], db["port"]
 
         if r.status_code >= 400:
             print(f"[DEBUG] Error {r.status_code}: {r.text}")
@@ -217,32 +213,30 @@ def create_search_db():
         last_error.raise_for_status()
     raise Exception("Failed to create DB with available Redis versions.")
 
+@traced()
 def wait_and_get_port(db_uid):
     print(f"[Task 3] Waiting for DB {db_uid} to become active...")
-    attempts = 0
-    max_attempts = 60
-    while True:
-        r = requests.get(f"{BASE_URL}/v1/bdbs/{db_uid}", auth=auth, verify=False, timeout=30)
+
+    def active_port():
+        r = client.get(f"/v1/bdbs/{db_uid}")
         data = r.json()
         if data.get("status") == "active":
-            port = _extract_port_from_bdb(data)
-            if port:
-                print(f"[Task 3] DB is ACTIVE on port: {port}")
-                return port
-            print("[Task 3] DB is ACTIVE but port is 0, retrying...")
-        attempts += 1
-        if attempts >= max_attempts:
-            print("[Task 3][WARN] Timed out waiting for port assignment.")
-            return 0
-        time.sleep(2)
+            return _extract_port_from_bdb(data)
+        return 0
 
+    try:
+        port = wait_until(active_port, 120, f"DB {db_uid} port")
+    except TimeoutError:
+        print("[Task 3][WARN] Timed out waiting for port assignment.")
+        return 0
+    print(f"[Task 3] DB is ACTIVE on port: {port}")
+    return port
+
+@traced()
 def resolve_port_from_list(db_uid):
-    r_list = requests.get(f"{BASE_URL}/v1/bdbs", auth=auth, verify=False, timeout=30)
-    if r_list.status_code == 200:
-        for db in r_list.json():
-            if db.get("uid") == db_uid:
-                return _extract_port_from_bdb(db)
-    return 0
+    # Last-resort fallback, so always read a fresh list
+    db = inventory.find("bdbs", refresh=True, uid=db_uid)
+    return _extract_port_from_bdb(db) if db else 0
 
 def _extract_port_from_bdb(bdb_info):
     # Common field
@@ -267,29 +261,25 @@ def _extract_port_from_bdb(bdb_info):
     return 0
 
 def find_db_uid_by_name(db_name: str):
-    r_list = requests.get(f"{BASE_URL}/v1/bdbs", auth=auth, verify=False, timeout=30)
-    if r_list.status_code == 200:
-        for db in r_list.json():
-            if db.get("name") == db_name:
-                return db.get("uid")
-    return None
+    db = inventory.find("bdbs", name=db_name)
+    return db.get("uid") if db else None
 
+@traced()
 def delete_db_if_exists(db_name: str):
     uid = find_db_uid_by_name(db_name)
     if not uid:
         return
     print(f"[Task 3] Deleting existing DB '{db_name}' (UID: {uid})...")
-    r = requests.delete(f"{BASE_URL}/v1/bdbs/{uid}", auth=auth, verify=False, timeout=30)
+    r = client.delete(f"/v1/bdbs/{uid}")
     if r.status_code >= 400:
         print(f"[DEBUG] Error {r.status_code}: {r.text}")
         r.raise_for_status()
-    # Wait until deletion is reflected in list
-    for _ in range(30):
-        if not find_db_uid_by_name(db_name):
-            print(f"[Task 3] DB '{db_name}' deleted.")
-            return
-        time.sleep(2)
-    print(f"[Task 3][WARN] DB '{db_name}' delete not confirmed yet, proceeding anyway.")
+    # Wait until the single-resource endpoint reports the DB gone
+    try:
+        wait_deleted(client, f"/v1/bdbs/{uid}", 60, f"delete of DB '{db_name}'", r)
+        print(f"[Task 3] DB '{db_name}' deleted.")
+    except TimeoutError:
+        print(f"[Task 3][WARN] DB '{db_name}' delete not confirmed yet, proceeding anyway.")
 
 def update_semantic_router_port(port: int):
     router_path = os.path.join(os.path.dirname(__file__), "semantic_router.py")
@@ -358,6 +348,8 @@ def update_config_host(port: int):
         print(f"[Task 3][WARN] Failed to write {config_path}: {e}")
 
 if __name__ == "__main__":
+    # RE_TRACE=<file>.json (Chrome trace) or <file>.jsonl records a span per REST call, wait and step
+    tracer = enable_from_env()
     try:
         delete_db_if_exists(DB_NAME)
         uid, port = create_search_db()
@@ -372,3 +364,7 @@ if __name__ == "__main__":
             
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        client.print_stats()
+        finish(tracer)
+        client.close()
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_LRU_SIZE = 4096
+_DIGEST_SIZE = 20
+
+
+class CachedEncoder:
+    """
+    Drop-in wrapper around a SentenceTransformer's encode() with a persistent,
+    content-addressed embedding cache.
+
+    Embeddings are keyed by sha1(model name + encode options + text). On disk
+    they are rows of a float32 matrix (<model>.f32, memory-mapped for reads) plus
+    an index file (<model>.idx) of fixed-size 20-byte digests in row order. Only
+    encode(..., persist=True) appends new embeddings to both, meant for the
+    bounded set of route references: other texts (user queries) only enter the
+    in-process LRU, so neither the files nor memory grow with distinct queries.
+    Only texts missing from both are sent to the model, in one batch. The files
+    are append-only and meant for one writer process at a time.
+
+    `model` may also be a zero-argument function returning the encoder (dims is
+    then required): it is only called on the first cache miss, so a warm cache
+    never loads the model at all.
+    """
+
+    def __init__(self, model, model_name: str, cache_dir: str, lru_size: int = DEFAULT_LRU_SIZE, dims: int = None):
+        lazy = callable(model) and not hasattr(model, "encode")
+        self._model = None if lazy else model
+        self._factory = model if lazy else None
+        self._load_lock = threading.Lock()
+        self.model_name = model_name
+        self.dims = dims or self.model.get_sentence_embedding_dimension()
+        self.lru_size = lru_size
+        os.makedirs(cache_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.vectors_path = os.path.join(cache_dir, f"{slug}.f32")
+        self.index_path = os.path.join(cache_dir, f"{slug}.idx")
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self._rows = {}
+        self._matrix = None
+        self.stats = {"lru_hits": 0, "disk_hits": 0, "misses": 0}
+        self._open()
+
+    @property
+    def model(self):
+        with self._load_lock:
+            if self._model is None:
+                self._model = self._factory()
+        return self._model
+
+    def _open(self):
+        row_bytes = self.dims * 4
+        vector_rows = os.path.getsize(self.vectors_path) // row_bytes if os.path.exists(self.vectors_path) else 0
+        digests = b""
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                digests = f.read()
+        # A crash between the two appends leaves one file longer; trust only complete rows
+        rows = min(vector_rows, len(digests) // _DIGEST_SIZE)
+        for row in range(rows):
+            self._rows[digests[row * _DIGEST_SIZE:(row + 1) * _DIGEST_SIZE]] = row
+        if vector_rows != rows or len(digests) != rows * _DIGEST_SIZE:
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+            with open(self.index_path, "ab") as f:
+                f.truncate(rows * _DIGEST_SIZE)
+        self._remap()
+
+    def _remap(self):
+        rows = len(self._rows)
+        self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dims)) if rows else None
+
+    def _digest(self, text: str, options: str = ""):
+        # Options (e.g. normalize_embeddings) change the vector, so they are part of the key
+        prefix = f"{self.model_name}\0{options}\0" if options else f"{self.model_name}\0"
+        return hashlib.sha1(f"{prefix}{text}".encode()).digest()
+
+    def _remember(self, digest, vector):
+        self._lru[digest] = vector
+        self._lru.move_to_end(digest)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True, persist: bool = False,
+               **kwargs):
+        """
+        Same contract as SentenceTransformer.encode for a str or a list of str;
+        with persist new embeddings are also written to the cache files
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        options = repr(sorted(kwargs.items())) if kwargs else ""
+        digests = [self._digest(t, options) for t in texts]
+        out = np.empty((len(texts), self.dims), dtype=np.float32)
+        missing = {}
+
+        with self._lock:
+            for i, digest in enumerate(digests):
+                if digest in self._lru:
+                    self._lru.move_to_end(digest)
+                    out[i] = self._lru[digest]
+                    self.stats["lru_hits"] += 1
+                elif digest in self._rows:
+                    out[i] = self._matrix[self._rows[digest]]
+                    self._remember(digest, out[i].copy())
+                    self.stats["disk_hits"] += 1
+                else:
+                    missing.setdefault(digest, []).append(i)
+
+        if missing:
+            first = [positions[0] for positions in missing.values()]
+            vectors = np.asarray(
+                self.model.encode([texts[i] for i in first], batch_size=batch_size, convert_to_numpy=True, **kwargs),
+                dtype=np.float32,
+            ).reshape(len(first), self.dims)
+            with self._lock:
+                new = [(d, v) for d, v in zip(missing, vectors) if d not in self._rows] if persist else []
+                if new:
+                    with open(self.vectors_path, "ab") as f:
+                        f.write(np.stack([v for _, v in new]).tobytes())
+                    with open(self.index_path, "ab") as f:
+                        f.write(b"".join(d for d, _ in new))
+                    for digest, _ in new:
+                        self._rows[digest] = len(self._rows)
+                    self._remap()
+                for (digest, positions), vector in zip(missing.items(), vectors):
+                    out[positions] = vector
+                    self._remember(digest, vector)
+                self.stats["misses"] += len(missing)
+
+        return out[0] if single else out
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getattr__(self, name):
+        # Everything else (e.g. get_sentence_embedding_dimension) goes to the wrapped model
+        if name in ("model", "_model", "_factory", "_load_lock"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
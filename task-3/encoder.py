@@ -0,0 +1,29 @@
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Dynamically quantized (int8) ONNX export published with the model on the Hugging Face Hub
+ONNX_INT8_FILE = "onnx/model_qint8_avx2.onnx"
+
+
+def load_encoder(model_name: str, backend: str = "torch", cache_dir: str = None):
+    """
+    Load a SentenceTransformer on the "torch", "onnx" or "onnx-int8" (quantized
+    CPU) backend. With cache_dir the model files live there: once the directory
+    is warm the model loads with local_files_only, skipping every Hub request;
+    the first call downloads into it.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend {backend!r}, expected one of {BACKENDS}")
+    # Imported here: sentence_transformers pulls in torch/transformers, seconds of startup
+    from sentence_transformers import SentenceTransformer
+
+    kwargs = {"cache_folder": cache_dir} if cache_dir else {}
+    if backend != "torch":
+        kwargs["backend"] = "onnx"
+        if backend == "onnx-int8":
+            kwargs["model_kwargs"] = {"file_name": ONNX_INT8_FILE}
+    if cache_dir:
+        try:
+            return SentenceTransformer(model_name, local_files_only=True, **kwargs)
+        except (OSError, ValueError):
+            print(f"[Model] {model_name} ({backend}) not in {cache_dir} yet, downloading")
+    return SentenceTransformer(model_name, **kwargs)
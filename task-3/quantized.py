@@ -0,0 +1,120 @@
+import numpy as np
+
+from centroids import normalize
+
+DEFAULT_CANDIDATES = 64
+KMEANS_ITERATIONS = 15
+
+
+class Int8Codes:
+    """Scalar quantization: each unit vector stored as int8 with one float32 scale (dims + 4 bytes)"""
+
+    def __init__(self, vectors):
+        vectors = normalize(vectors)
+        self.scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127
+        self.codes = np.round(vectors / self.scales[:, None]).astype(np.int8)
+
+    def bytes_per_vector(self):
+        return self.codes.shape[1] + 4
+
+    def scores(self, queries):
+        """Approximate cosine similarity of every query to every stored vector"""
+        return (normalize(queries) @ self.codes.T.astype(np.float32)) * self.scales
+
+
+class PQCodes:
+    """
+    Product quantization: the vector is split into `subspaces` chunks and each
+    chunk is replaced by the uint8 id of its nearest of 256 centroids (one byte
+    per subspace). Similarities use per-query lookup tables (asymmetric distance).
+    """
+
+    def __init__(self, vectors, subspaces: int = 48, seed: int = 0):
+        vectors = normalize(vectors)
+        dims = vectors.shape[1]
+        if dims % subspaces:
+            raise ValueError(f"{dims} dims cannot be split into {subspaces} subspaces")
+        self.subspaces = subspaces
+        self.width = dims // subspaces
+        rng = np.random.default_rng(seed)
+        self.codebooks, codes = [], []
+        for s in range(subspaces):
+            chunk = vectors[:, s * self.width:(s + 1) * self.width]
+            codebook = self._kmeans(chunk, min(256, len(chunk)), rng)
+            self.codebooks.append(codebook)
+            codes.append(self._assign(chunk, codebook))
+        self.codes = np.stack(codes, axis=1).astype(np.uint8)
+
+    @staticmethod
+    def _assign(chunk, codebook):
+        d = (chunk ** 2).sum(1)[:, None] - 2 * chunk @ codebook.T + (codebook ** 2).sum(1)[None, :]
+        return np.argmin(d, axis=1)
+
+    def _kmeans(self, chunk, k, rng):
+        centers = chunk[rng.choice(len(chunk), k, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assign = self._assign(chunk, centers)
+            counts = np.bincount(assign, minlength=k)
+            sums = np.zeros_like(centers)
+            np.add.at(sums, assign, chunk)
+            filled = counts > 0
+            centers[filled] = sums[filled] / counts[filled, None]
+        return centers
+
+    def bytes_per_vector(self):
+        return self.subspaces
+
+    def scores(self, queries):
+        queries = normalize(queries)
+        total = np.zeros((len(queries), len(self.codes)), dtype=np.float32)
+        for s, codebook in enumerate(self.codebooks):
+            table = queries[:, s * self.width:(s + 1) * self.width] @ codebook.T
+            total += table[:, self.codes[:, s]]
+        return total
+
+
+class QuantizedSearch:
+    """
+    In-process KNN over quantized codes ("int8" or "pq") with an exact rerank.
+
+    The codes pick `candidates` nearest vectors per query cheaply; those are
+    then rescored against the vectors kept at rerank_dtype (float32 by default)
+    and the best k returned as (row, cosine distance) pairs.
+    """
+
+    def __init__(self, vectors, kind: str = "int8", candidates: int = DEFAULT_CANDIDATES,
+                 rerank_dtype: str = "float32", **options):
+        self.kind = kind
+        self.codes = Int8Codes(vectors) if kind == "int8" else PQCodes(vectors, **options)
+        self.rerank = normalize(vectors).astype(rerank_dtype)
+        self.candidates = candidates
+
+    def bytes_per_vector(self):
+        return self.codes.bytes_per_vector()
+
+    def search(self, queries, k: int = 1):
+        queries = normalize(queries)
+        approx = self.codes.scores(queries)
+        c = min(max(self.candidates, k), approx.shape[1])
+        candidates = np.argpartition(-approx, c - 1, axis=1)[:, :c]
+        exact = np.einsum("qd,qcd->qc", queries, self.rerank[candidates].astype(np.float32))
+        order = np.argsort(-exact, axis=1)[:, :k]
+        rows = np.take_along_axis(candidates, order, axis=1)
+        distances = 1 - np.take_along_axis(exact, order, axis=1)
+        return rows, distances
+
+
+class QuantizedRouter:
+    """Route with a QuantizedSearch over the reference embeddings of every route (k=1)"""
+
+    def __init__(self, route_embeddings: dict, kind: str = "int8", **options):
+        self.labels = [name for name, vectors in route_embeddings.items() for _ in range(len(vectors))]
+        arrays = [np.asarray(v, dtype=np.float32) for v in route_embeddings.values() if len(v)]
+        # An empty route index routes nothing instead of failing here
+        self.search = QuantizedSearch(np.concatenate(arrays), kind, **options) if arrays else None
+
+    def route(self, embeddings):
+        if self.search is None:
+            return [{"route": None, "distance": None} for _ in embeddings]
+        rows, distances = self.search.search(embeddings, k=1)
+        return [{"route": self.labels[r[0]], "distance": float(d[0])} for r, d in zip(rows, distances)]
@@ -0,0 +1,140 @@
+import argparse
+import json
+import re
+import sys
+
+from redis import BlockingConnectionPool, Redis
+
+import semantic_router
+from semantic_router import META_KEY, REDIS_URL, ROUTE_PREFIX, build_schema, route_batch, setup_router
+
+DEFAULT_CONNECTIONS = 8
+CACHE_SUFFIX = "semantic-cache"
+
+_SET_NAME = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def check_set_name(name: str):
+    """
+    Raise ValueError unless `name` is safe as a key prefix: only [A-Za-z0-9_-], and
+    no overlap with the keys of the default router (route:*), of the default cache
+    (semantic-cache:*) or of another set's cache (<set>-semantic-cache:*).
+    """
+    if not name or not _SET_NAME.fullmatch(name):
+        raise ValueError(f"Invalid route set name {name!r} (letters, digits, '_' and '-' only)")
+    if name.startswith(ROUTE_PREFIX):
+        raise ValueError(f"Invalid route set name {name!r} (must not start with {ROUTE_PREFIX!r})")
+    if CACHE_SUFFIX in name:
+        raise ValueError(f"Invalid route set name {name!r} (must not contain {CACHE_SUFFIX!r})")
+
+
+class RouteSet:
+    """One named route catalog with its own key prefix, index and (optional) cache and centroid fast path"""
+
+    def __init__(self, name: str, routes: dict, index, cache=None, centroids=None):
+        self.name = name
+        self.routes = routes
+        self.index = index
+        self.cache = cache
+        self.centroids = centroids
+
+    def route(self, queries):
+        return route_batch(self.index, queries, self.cache, self.centroids)
+
+
+class RouterRegistry:
+    """
+    Many independent route sets on one Redis DB.
+
+    Set "shop" keeps its references under shop:route:* with index
+    shop-router-index and schema fingerprint semantic-router:meta:shop. Every
+    set shares one connection pool and the module-level encoder, so another
+    tenant costs an index and its keys, not connections or another model.
+    """
+
+    def __init__(self, redis_url: str = REDIS_URL, connections: int = DEFAULT_CONNECTIONS):
+        # Not decoded: redisvl and the stored vectors need raw bytes
+        self.pool = BlockingConnectionPool.from_url(redis_url, max_connections=connections)
+        self.client = Redis(connection_pool=self.pool)
+        self.sets = {}
+
+    def register(self, name: str, routes: dict, force: bool = False, algorithm: str = None,
+                 datatype: str = None, semantic_cache: bool = False, centroids: int = 0,
+                 centroid_margin: float = 0.05, rebuild_on_change: bool = False, **hnsw):
+        """
+        Create or sync the index of route set `name` and make it routable. Without
+        algorithm and datatype the set keeps the options it was set up with (flat,
+        float32 for a new set). An index set up with another schema or encoder is
+        only dropped with force or rebuild_on_change, else RuntimeError.
+        """
+        check_set_name(name)
+        meta_key = f"{META_KEY}:{name}"
+        if algorithm or datatype:
+            options = {"algorithm": algorithm or "flat", "datatype": datatype or "float32", **hnsw}
+        else:
+            options = semantic_router.stored_schema_options(self.client, meta_key)
+        schema = build_schema(name=f"{name}-router-index", prefix=f"{name}:{ROUTE_PREFIX}", **options)
+        index = setup_router(force, schema, routes, self.client, meta_key, rebuild_on_change)
+        cache = semantic_router.open_semantic_cache(index, routes, name=f"{name}-{CACHE_SUFFIX}") \
+            if semantic_cache else None
+        fast = semantic_router.build_centroid_router(index, centroids, centroid_margin) if centroids else None
+        self.sets[name] = RouteSet(name, routes, index, cache, fast)
+        return self.sets[name]
+
+    def get(self, name: str):
+        if name not in self.sets:
+            raise KeyError(f"Unknown route set {name!r}, registered: {', '.join(sorted(self.sets)) or 'none'}")
+        return self.sets[name]
+
+    def route(self, name: str, queries):
+        """route_batch on route set `name`"""
+        return self.get(name).route(queries)
+
+    def unregister(self, name: str, drop: bool = False):
+        """Forget a route set; with drop also delete its index, keys, fingerprint and cache"""
+        route_set = self.sets.pop(name)
+        if drop:
+            route_set.index.delete(drop=True)
+            self.client.delete(f"{META_KEY}:{name}")
+            if route_set.cache:
+                route_set.cache.clear()
+
+    def close(self):
+        self.pool.disconnect()
+
+
+def load_route_sets(path: str):
+    """JSON file {set name: {route: [sentences]}}"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route queries against one of many named route sets")
+    parser.add_argument("route_sets", help="JSON file {set name: {route: [sentences]}}")
+    parser.add_argument("--set", dest="set_name", required=True, help="Route set to route the queries with")
+    parser.add_argument("queries", nargs="+")
+    parser.add_argument("--rebuild", action="store_true", help="Recreate every set's index")
+    parser.add_argument("--algorithm", choices=("flat", "hnsw"),
+                        help="Vector index algorithm (default: as each set was set up, else flat)")
+    parser.add_argument("--datatype", choices=("float32", "float16"),
+                        help="Stored vector precision (default: as each set was set up, else float32)")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS, help="Shared pool size")
+    args = parser.parse_args()
+
+    registry = RouterRegistry(connections=args.connections)
+    try:
+        for name, routes in load_route_sets(args.route_sets).items():
+            registry.register(name, routes, force=args.rebuild, algorithm=args.algorithm, datatype=args.datatype)
+        for match in registry.route(args.set_name, args.queries):
+            print(f"[Router] {args.set_name}: {match['query']!r} -> {match['route']} ({match['distance']})")
+    except (KeyError, ValueError, RuntimeError) as e:
+        print(f"[Router][ERROR] {e.args[0]}")
+        return 1
+    finally:
+        registry.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
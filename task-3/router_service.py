@@ -0,0 +1,282 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+import semantic_router
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_MAX_QUEUE = 10000
+LATENCY_WINDOW = 10000
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error",
+            503: "Service Unavailable"}
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"p50": 0.0, "p99": 0.0, "max": 0.0}
+    values = np.fromiter(samples, dtype=np.float64)
+    return {"p50": float(np.percentile(values, 50)), "p99": float(np.percentile(values, 99)),
+            "max": float(values.max())}
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent routing requests into batches for route_batch.
+
+    A batch is closed when it reaches max_batch queries or when the oldest query
+    has waited max_wait_ms, whichever comes first, and then runs in a worker
+    thread (encoding and the Redis round trips are blocking). At most max_queue
+    queries wait at a time; beyond that route() raises asyncio.QueueFull instead
+    of letting the backlog grow. Latencies of the last LATENCY_WINDOW requests
+    are kept for the metrics.
+    """
+
+    def __init__(self, route_fn, max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 workers: int = 1, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.route_fn = route_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.started = time.monotonic()
+        self.counters = {"requests": 0, "errors": 0, "rejected": 0, "batches": 0, "max_batch_size": 0}
+        self.latency_ms = deque(maxlen=LATENCY_WINDOW)
+        self.queue_wait_ms = deque(maxlen=LATENCY_WINDOW)
+        self.batch_ms = deque(maxlen=LATENCY_WINDOW)
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _enqueue(self, queries):
+        if self.queue.maxsize and self.queue.maxsize - self.queue.qsize() < len(queries):
+            self.counters["rejected"] += len(queries)
+            raise asyncio.QueueFull(
+                f"{len(queries)} queries do not fit, {self.queue.qsize()}/{self.queue.maxsize} queued")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for query in queries:
+            futures.append(loop.create_future())
+            self.queue.put_nowait((query, time.perf_counter(), futures[-1]))
+        return futures
+
+    async def route(self, query: str):
+        return await self._enqueue([query])[0]
+
+    async def route_many(self, queries):
+        """Enqueue all queries or none (asyncio.QueueFull); results in order"""
+        return list(await asyncio.gather(*self._enqueue(queries)))
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        deadline = batch[0][1] + self.max_wait
+        while len(batch) < self.max_batch:
+            # Whatever is already queued joins the batch even past the deadline
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            try:
+                results = await asyncio.to_thread(self.route_fn, [q for q, _, _ in batch])
+            except Exception as e:
+                self.counters["errors"] += len(batch)
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            done = time.perf_counter()
+
+            self.counters["requests"] += len(batch)
+            self.counters["batches"] += 1
+            self.counters["max_batch_size"] = max(self.counters["max_batch_size"], len(batch))
+            self.batch_sizes.append(len(batch))
+            self.batch_ms.append((done - started) * 1000)
+            for (_, enqueued, future), result in zip(batch, results):
+                self.queue_wait_ms.append((started - enqueued) * 1000)
+                self.latency_ms.append((done - enqueued) * 1000)
+                if not future.done():
+                    future.set_result(result)
+
+    def metrics(self):
+        uptime = time.monotonic() - self.started
+        return {
+            **self.counters,
+            "uptime_s": uptime,
+            "throughput_qps": self.counters["requests"] / uptime if uptime else 0.0,
+            "avg_batch_size": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            "queue_depth": self.queue.qsize(),
+            "latency_ms": _percentiles(self.latency_ms),
+            "queue_wait_ms": _percentiles(self.queue_wait_ms),
+            "batch_ms": _percentiles(self.batch_ms),
+        }
+
+
+class RouterService:
+    """
+    Minimal HTTP/1.1 (keep-alive) front end for a MicroBatcher, on TCP or a Unix socket.
+
+    POST /route   {"query": "..."} -> {"query", "route", "distance"}
+                  {"queries": [...]} -> list of the same
+    GET  /metrics  throughput, batch sizes and latency percentiles
+    GET  /health
+    """
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+
+    async def _dispatch(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/metrics":
+            return 200, self.batcher.metrics()
+        if method == "POST" and path == "/route":
+            # Validated here: one bad query must not fail the micro-batch it would share with others
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict):
+                return 400, {"error": "expected a JSON object"}
+            if "queries" in request:
+                queries = request["queries"]
+                if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+                    return 400, {"error": "'queries' must be a list of strings"}
+                return 200, await self.batcher.route_many(queries)
+            if "query" in request:
+                if not isinstance(request["query"], str):
+                    return 400, {"error": "'query' must be a string"}
+                return 200, await self.batcher.route(request["query"])
+            return 400, {"error": "expected 'query' or 'queries'"}
+        return 404, {"error": f"no route for {method} {path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+
+                try:
+                    status, payload = await self._dispatch(method, path.split("?", 1)[0], body)
+                except ValueError as e:
+                    status, payload = 400, {"error": str(e)}
+                except asyncio.QueueFull as e:
+                    status, payload = 503, {"error": f"overloaded, {e}"}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _log_metrics(batcher, interval):
+    while True:
+        await asyncio.sleep(interval)
+        m = batcher.metrics()
+        print(f"[Service] {m['requests']} requests, {m['throughput_qps']:.0f} q/s, avg batch {m['avg_batch_size']:.1f}, "
+              f"p50 {m['latency_ms']['p50']:.1f}ms, p99 {m['latency_ms']['p99']:.1f}ms")
+
+
+async def serve(args):
+    # Model and index are loaded once for the lifetime of the service. The index keeps the
+    # options it was set up with; a mismatch is an error unless --rebuild allows dropping it
+    schema = None
+    if args.algorithm or args.datatype:
+        schema = semantic_router.build_schema(args.algorithm or "flat", datatype=args.datatype or "float32")
+    index = semantic_router.setup_router(force=args.rebuild, index_schema=schema, rebuild_on_change=False)
+    centroids = semantic_router.build_centroid_router(index, args.centroids, args.centroid_margin) if args.centroids else None
+    cache = semantic_router.open_semantic_cache(index) if args.semantic_cache else None
+
+    batcher = MicroBatcher(lambda queries: semantic_router.route_batch(index, queries, cache, centroids),
+                           args.max_batch, args.max_wait_ms, args.workers, args.max_queue)
+    batcher.start()
+    service = RouterService(batcher)
+    if args.unix:
+        server = await asyncio.start_unix_server(service.handle, path=args.unix)
+        where = f"unix:{args.unix}"
+    else:
+        server = await asyncio.start_server(service.handle, args.host, args.port)
+        where = f"http://{args.host}:{args.port}"
+    print(f"[Service] Routing on {where} (max batch {args.max_batch}, max wait {args.max_wait_ms}ms)")
+
+    logger = asyncio.create_task(_log_metrics(batcher, args.log_interval)) if args.log_interval else None
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if logger:
+            logger.cancel()
+        await batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running semantic routing service with micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--unix", help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="Max queries per batch")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="Max time the first query of a batch waits for more")
+    parser.add_argument("--workers", type=int, default=1, help="Batches processed concurrently")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Queries allowed to wait; requests beyond that get 503")
+    parser.add_argument("--rebuild", action="store_true", help="Recreate the index and re-embed every route")
+    parser.add_argument("--algorithm", choices=("flat", "hnsw"),
+                        help="Vector index algorithm (default: as the index was set up)")
+    parser.add_argument("--datatype", choices=("float32", "float16"),
+                        help="Stored vector precision (default: as the index was set up)")
+    parser.add_argument("--centroids", type=int, default=0, help="Centroid fast path prototypes per route (0 = off)")
+    parser.add_argument("--centroid-margin", type=float, default=0.05)
+    parser.add_argument("--semantic-cache", action="store_true", help="Enable the Redis semantic cache")
+    parser.add_argument("--log-interval", type=float, default=30, help="Seconds between metric log lines (0 = off)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        print(f"[Service][ERROR] {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import hashlib
+import time
+
+import numpy as np
+from redisvl.index import SearchIndex
+from redisvl.query import VectorQuery
+from redisvl.redis.utils import array_to_buffer
+from redisvl.schema import IndexSchema
+
+DEFAULT_DISTANCE_THRESHOLD = 0.05
+DEFAULT_TTL = 3600
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class SemanticCache:
+    """
+    Redis-backed cache of routed queries, looked up by embedding similarity.
+
+    Each entry is a HASH (<name>:<vector hash>) holding a previously routed query
+    embedding and its route. A lookup is one KNN (k=1) against this secondary
+    index; anything within distance_threshold (cosine) is a hit and skips the
+    search on the route index. Entries expire after `ttl` seconds. A sorted set
+    of last-access times caps the cache at max_entries, evicting least recently
+    used entries first; a second one, scored by expiry time, lets expired entries
+    leave it before the size is counted. All entries are dropped when the route
+    catalog version passed to create() changes. `name` is also the key prefix,
+    so it must not start with the route index prefix ("route").
+    """
+
+    def __init__(self, redis_client, dims: int, name: str = "semantic-cache",
+                 distance_threshold: float = DEFAULT_DISTANCE_THRESHOLD, ttl: int = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.client = redis_client
+        self.name = name
+        self.distance_threshold = distance_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lru_key = f"{name}-meta:lru"
+        self.expiry_key = f"{name}-meta:expiry"
+        self.version_key = f"{name}-meta:version"
+        self.index = SearchIndex(IndexSchema.from_dict({
+            "index": {"name": f"{name}-index", "prefix": name, "storage_type": "hash"},
+            "fields": [
+                {"name": "route_name", "type": "tag"},
+                {"name": "route_distance", "type": "numeric"},
+                {"name": "embedding", "type": "vector", "attrs": {
+                    "dims": dims,
+                    "algorithm": "flat",
+                    "distance_metric": "cosine",
+                    "datatype": "float32"
+                }}
+            ]
+        }), redis_client=redis_client)
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def create(self, catalog_version: str = ""):
+        """Create the cache index if needed; clear it when the route catalog changed"""
+        if not self.index.exists():
+            self.index.create()
+        current = self.client.get(self.version_key)
+        if isinstance(current, bytes):
+            current = current.decode()
+        if current != catalog_version:
+            self.clear()
+            self.client.set(self.version_key, catalog_version)
+
+    def clear(self):
+        self.index.clear()
+        self.client.delete(self.lru_key, self.expiry_key)
+
+    def _key(self, embedding):
+        return f"{self.name}:{hashlib.sha1(np.asarray(embedding, dtype=np.float32).tobytes()).hexdigest()}"
+
+    def check_batch(self, embeddings):
+        """One {"route", "distance"} (the original match) per hit, None per miss"""
+        queries = [
+            VectorQuery(vector=e, vector_field_name="embedding",
+                        return_fields=["route_name", "route_distance"], num_results=1)
+            for e in embeddings
+        ]
+        if not queries:
+            return []
+        results = self.index.batch_query(queries, batch_size=len(queries))
+        matches, touched = [], {}
+        now = time.time()
+        for r in results:
+            if r and float(r[0]["vector_distance"]) <= self.distance_threshold:
+                matches.append({"route": r[0]["route_name"], "distance": float(r[0]["route_distance"])})
+                touched[r[0]["id"]] = now
+            else:
+                matches.append(None)
+        if touched:
+            self.client.zadd(self.lru_key, touched)
+        hits = sum(m is not None for m in matches)
+        self.stats["hits"] += hits
+        self.stats["misses"] += len(matches) - hits
+        return matches
+
+    def store_batch(self, embeddings, matches):
+        """Cache routed results (matches without a route are skipped), then evict beyond max_entries"""
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        # Entries gone by TTL must not count towards max_entries
+        expired = self.client.zrangebyscore(self.expiry_key, "-inf", now) if self.ttl else []
+        if expired:
+            pipe.zrem(self.lru_key, *expired)
+            pipe.zrem(self.expiry_key, *expired)
+        stored = 0
+        for embedding, match in zip(embeddings, matches):
+            if not match or not match.get("route"):
+                continue
+            key = self._key(embedding)
+            pipe.hset(key, mapping={
+                "route_name": match["route"],
+                "route_distance": match["distance"],
+                "embedding": array_to_buffer(embedding, dtype="float32")
+            })
+            if self.ttl:
+                pipe.expire(key, self.ttl)
+                pipe.zadd(self.expiry_key, {key: now + self.ttl})
+            pipe.zadd(self.lru_key, {key: now})
+            stored += 1
+        if not stored:
+            pipe.execute()
+            return 0
+        pipe.zcard(self.lru_key)
+        excess = pipe.execute()[-1] - self.max_entries
+        if excess > 0:
+            # Least recently used first
+            victims = [member for member, _ in self.client.zpopmin(self.lru_key, excess)]
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*victims)
+            if self.ttl:
+                pipe.zrem(self.expiry_key, *victims)
+            pipe.execute()
+            self.stats["evictions"] += len(victims)
+        self.stats["stores"] += stored
+        return stored
+
+    def hit_rate(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
@@ -1,26 +1,57 @@
+import argparse
+import hashlib
 import json
 import os
+import re
 import sys
+import time
 
 import urllib3
-import numpy as np
-from redisvl.index import SearchIndex
-from redisvl.schema import IndexSchema
-from redisvl.redis.utils import array_to_buffer
-from sentence_transformers import SentenceTransformer
 from redis import Redis
-from redisvl.query import VectorQuery 
 
 # Suppress warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Load local configuration and route references
-from config import REDIS_HOST, REDIS_PW
+from config import REDIS_HOST, REDIS_PW, EMBEDDING_CACHE_DIR, ENCODER_BACKEND, MODEL_CACHE_DIR
 from embeddings.routes import ROUTES
 
+# sentence_transformers (torch), redisvl and numpy are imported where they are first
+# needed, so tools that only need the config or schema start in a fraction of a second.
+
 # 1. Initialize Embedding Model
-# This model converts text into 384-dimensional vectors
-model = SentenceTransformer("all-MiniLM-L6-v2")
+# This model converts text into 384-dimensional vectors; it is loaded on first use
+MODEL_NAME = "all-MiniLM-L6-v2"
+MODEL_DIMS = 384
+# Stored vectors are only comparable with query vectors from the same encoder
+ENCODER_ID = {"model": MODEL_NAME, "backend": ENCODER_BACKEND, "dims": MODEL_DIMS}
+_model = None
+
+def _load_model():
+    from encoder import load_encoder
+    return load_encoder(MODEL_NAME, ENCODER_BACKEND, MODEL_CACHE_DIR or None)
+
+def get_model():
+    """The encoder, loaded on first use"""
+    global _model
+    if _model is None:
+        if EMBEDDING_CACHE_DIR:
+            from embedding_cache import CachedEncoder
+            # Reference embeddings survive restarts (queries stay in a bounded LRU); only unseen
+            # texts reach the transformer, which is not even loaded while every text is cached
+            cache_name = MODEL_NAME if ENCODER_BACKEND == "torch" else f"{MODEL_NAME}@{ENCODER_BACKEND}"
+            _model = CachedEncoder(_load_model, cache_name, EMBEDDING_CACHE_DIR, dims=MODEL_DIMS)
+        else:
+            _model = _load_model()
+    return _model
+
+class _LazyModel:
+    """Stands in for the encoder at module level; the first attribute access loads it"""
+
+    def __getattr__(self, name):
+        return getattr(get_model(), name)
+
+model = _LazyModel()
 
 # 2. Get Database Connection Info
 # Port is written by create_task3_db.py
@@ -33,97 +64,378 @@ else:
     REDIS_URL = f"redis://{REDIS_HOST}:{port}"
 
 # 3. Define Vector Index Schema
-schema = IndexSchema.from_dict({
-    "index": {
-        "name": "semantic-router-index",
-        "prefix": "route",
-        "storage_type": "hash"
-    },
-    "fields": [
-        {"name": "route_name", "type": "text"},
-        {"name": "embedding", "type": "vector", "attrs": {
-            "dims": 384,
-            "algorithm": "flat",       # Exact search for accuracy
-            "distance_metric": "cosine",
-            "datatype": "float32"
-        }}
-    ]
-})
-
-def _to_embedding_bytes(vec):
+# HNSW defaults are RediSearch's own; EF_RUNTIME can also be overridden per query
+HNSW_DEFAULTS = {"m": 16, "ef_construction": 200, "ef_runtime": 10}
+# Key prefix of the default route index
+ROUTE_PREFIX = "route"
+
+def build_schema(algorithm: str = "flat", name: str = "semantic-router-index", prefix: str = ROUTE_PREFIX,
+                 dims: int = MODEL_DIMS, datatype: str = "float32", **hnsw):
+    """
+    Route index schema. "flat" is an exact search, fine for a few thousand
+    references; "hnsw" is approximate and takes m, ef_construction, ef_runtime.
+    """
+    from redisvl.schema import IndexSchema
+
+    attrs = {
+        "dims": dims,
+        "algorithm": algorithm,
+        "distance_metric": "cosine",
+        "datatype": datatype
+    }
+    if algorithm == "hnsw":
+        attrs.update({**HNSW_DEFAULTS, **hnsw})
+    return IndexSchema.from_dict({
+        "index": {
+            "name": name,
+            "prefix": prefix,
+            "storage_type": "hash"
+        },
+        "fields": [
+            {"name": "route_name", "type": "text"},
+            {"name": "embedding", "type": "vector", "attrs": attrs}
+        ]
+    })
+
+# Fingerprint of the schema the loaded route keys were written with
+META_KEY = "semantic-router:meta"
+# Sentences per forward pass; MiniLM on CPU gains little beyond this
+ENCODE_BATCH_SIZE = 64
+# HSETs / DELs per pipeline round trip
+LOAD_CHUNK_SIZE = 500
+
+def vector_dtype(index_schema):
+    """numpy dtype name of the index's embedding field, e.g. float16"""
+    return index_schema.fields["embedding"].attrs.datatype.value.lower()
+
+def schema_options(index_schema):
+    """build_schema() arguments (algorithm, datatype, HNSW parameters) of the index's embedding field"""
+    attrs = index_schema.fields["embedding"].attrs
+    options = {"algorithm": attrs.algorithm.value.lower(), "datatype": vector_dtype(index_schema)}
+    if options["algorithm"] == "hnsw":
+        options.update(m=attrs.m, ef_construction=attrs.ef_construction, ef_runtime=attrs.ef_runtime)
+    return options
+
+def stored_schema_options(redis_client, meta_key: str = META_KEY):
+    """schema_options the route index was last set up with, {} if unknown"""
+    stored = _text(redis_client.hget(meta_key, "options"))
+    return json.loads(stored) if stored else {}
+
+def _to_embedding_bytes(vec, dtype: str = "float32"):
     # Official RedisVL helper to store vector bytes in HASH storage
-    return array_to_buffer(vec, dtype="float32")
-
-def setup_router():
-    """Create index and load route reference embeddings"""
-    index = SearchIndex(schema, redis_url=REDIS_URL)
-    
-    # Create index in Redis (requires RediSearch module)
-    index.create(overwrite=True)
-
-    # Load data manually via Redis client to avoid the list conversion issue
-    redis_client = Redis.from_url(REDIS_URL, decode_responses=False)
-    
-    pipe = redis_client.pipeline()
-    doc_id = 0
-    
-    for route_name, references in ROUTES.items():
-        for ref in references:
-            # Encode reference to embedding
-            embedding = model.encode(ref)
-            # Convert to bytes format that Redis accepts
-            embedding_bytes = array_to_buffer(embedding, dtype="float32")
-            
-            # Store as HASH with proper key prefix
-            key = f"route:{doc_id}"
+    from redisvl.redis.utils import array_to_buffer
+    return array_to_buffer(vec, dtype=dtype)
+
+def _fingerprint(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True).encode()).hexdigest()
+
+def _text(value):
+    # Shared clients (RouterRegistry) do not decode responses
+    return value.decode() if isinstance(value, bytes) else value
+
+def _scan_pattern(prefix: str):
+    """SCAN MATCH pattern for the keys under <prefix>:, with glob characters in the prefix escaped"""
+    return re.sub(r"([*?\[\]\\])", r"\\\1", prefix) + ":*"
+
+def route_key(name: str, reference: str, prefix: str = ROUTE_PREFIX):
+    """Content-addressed key of one reference: the same sentence always maps to the same key"""
+    return f"{prefix}:{name}:{hashlib.sha1(reference.encode()).hexdigest()[:16]}"
+
+def _load_routes(redis_client, items, dtype: str = "float32"):
+    """Encode (key, route, reference) items in one batched call and HSET them in chunked pipelines"""
+    if not items:
+        return 0
+    # References are a bounded set: only they are written to the persistent cache
+    persist = {"persist": True} if EMBEDDING_CACHE_DIR else {}
+    embeddings = model.encode([ref for _, _, ref in items], batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True,
+                              **persist)
+    for start in range(0, len(items), LOAD_CHUNK_SIZE):
+        pipe = redis_client.pipeline(transaction=False)
+        chunk = zip(items[start:start + LOAD_CHUNK_SIZE], embeddings[start:start + LOAD_CHUNK_SIZE])
+        for (key, name, ref), embedding in chunk:
             pipe.hset(key, mapping={
-                "route_name": route_name,
-                "embedding": embedding_bytes
+                "route_name": name,
+                "reference": ref,
+                "embedding": _to_embedding_bytes(embedding, dtype)
             })
-            doc_id += 1
-    
-    # Execute all commands
-    pipe.execute()
-    redis_client.close()
-    
+        pipe.execute()
+    return len(items)
+
+def _delete_keys(redis_client, keys):
+    for start in range(0, len(keys), LOAD_CHUNK_SIZE):
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.unlink(*keys[start:start + LOAD_CHUNK_SIZE])
+        pipe.execute()
+
+def sync_routes(redis_client, routes, dtype: str = "float32", prefix: str = ROUTE_PREFIX):
+    """
+    Make the <prefix>:* keys in Redis match `routes`. Keys are content hashes, so
+    the delta is a set difference: only new references are embedded and written,
+    only keys no longer in the catalog are deleted. Returns (added, removed).
+    """
+    wanted = {route_key(name, ref, prefix): (name, ref) for name, refs in routes.items() for ref in refs}
+    existing = {_text(k) for k in redis_client.scan_iter(match=_scan_pattern(prefix), count=1000)}
+    removed = sorted(existing - wanted.keys())
+    _delete_keys(redis_client, removed)
+    added = _load_routes(redis_client, [(k, *v) for k, v in wanted.items() if k not in existing], dtype)
+    return added, len(removed)
+
+def setup_router(force: bool = False, index_schema=None, routes=None, redis_client=None, meta_key: str = META_KEY,
+                 rebuild_on_change: bool = True):
+    """
+    Create the index and sync route reference embeddings (ROUTES by default).
+    The index is only recreated, and every reference re-embedded, when it is
+    missing or the schema or the encoder (ENCODER_ID) changed (or with force);
+    otherwise only references added since the last run are embedded and removed
+    ones deleted. Switching between flat and HNSW (or changing its parameters) is
+    a schema change. Without index_schema the options the index was last set up
+    with are reused (build_schema() defaults for a new index), so consumers such
+    as the routing service need not repeat them. With rebuild_on_change False a
+    changed schema or encoder raises RuntimeError instead of dropping an
+    existing index. With redis_client the index and the sync use that
+    connection instead of opening their own.
+    """
+    from redisvl.index import SearchIndex
+
+    t0 = time.perf_counter()
+    routes = ROUTES if routes is None else routes
+    client = redis_client if redis_client is not None else Redis.from_url(REDIS_URL, decode_responses=True)
+    try:
+        index_schema = index_schema or build_schema(**stored_schema_options(client, meta_key))
+        if redis_client is None:
+            index = SearchIndex(index_schema, redis_url=REDIS_URL)
+        else:
+            index = SearchIndex(index_schema, redis_client=redis_client)
+        schema_hash = _fingerprint({"schema": index_schema.to_dict(), "encoder": ENCODER_ID})
+        changed = _text(client.hget(meta_key, "schema")) != schema_hash
+        exists = index.exists()
+        if changed and exists and not force and not rebuild_on_change:
+            raise RuntimeError(f"Index {index_schema.index.name} was set up with another schema or encoder; "
+                               f"rerun with --rebuild to drop it and re-embed every reference")
+        if force or changed or not exists:
+            # Create index in Redis (requires RediSearch module); drop=True also removes old route keys
+            print(f"[Router] Creating index {index_schema.index.name} (missing, schema or encoder changed, or forced)")
+            index.create(overwrite=True, drop=True)
+            # Also drops per-route fingerprints left by older versions
+            client.delete(meta_key)
+
+        added, removed = sync_routes(client, routes, vector_dtype(index_schema), index_schema.index.prefix)
+        client.hset(meta_key, mapping={"schema": schema_hash, "options": json.dumps(schema_options(index_schema))})
+    finally:
+        if client is not redis_client:
+            client.close()
+
+    total = sum(len(set(refs)) for refs in routes.values())
+    print(f"[Router] {index_schema.index.name}: {total} references in {len(routes)} routes, {added} embedded, "
+          f"{removed} removed, ready in {time.perf_counter() - t0:.2f}s")
     return index
 
-def route_query(index, query: str):
-    """Find the best route for a given query"""
-    # Convert query to vector
-    query_embedding = model.encode(query)
-    
-    # Create VectorQuery object - INI CARA YANG BENAR
-    vq = VectorQuery(
-        vector=query_embedding,
+# Queries per pipeline round trip in route_batch
+QUERY_PIPELINE_SIZE = 100
+
+def _vector_query(embedding, dtype: str = "float32"):
+    from redisvl.query import VectorQuery
+    return VectorQuery(
+        vector=embedding,
         vector_field_name="embedding",
         return_fields=["route_name"],
-        num_results=1
+        num_results=1,
+        dtype=dtype
     )
-    
-    # Execute query
-    results = index.query(vq)
-    
-    if results:
-        # results adalah list of dicts
-        print(results[0]["route_name"])
+
+def _best_match(results):
+    if not results:
+        return {"route": None, "distance": None}
+    return {"route": results[0]["route_name"], "distance": float(results[0]["vector_distance"])}
+
+def route_batch(index, queries, cache=None, centroids=None, quantized=None):
+    """
+    Route many queries at once; returns one {"query", "route", "distance"} dict per
+    query, in order (route is None when nothing matched). All queries are encoded
+    in one batched forward pass and the KNN searches are sent through pipelines.
+    With a CentroidRouter, queries with a clear winner are routed in-process; with
+    a SemanticCache, near-duplicates of earlier queries are answered from it. Only
+    what is left is searched on the route index (and then cached), or in-process
+    with a QuantizedRouter instead.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+    embeddings = model.encode(queries, convert_to_numpy=True)
+    matches = [None] * len(queries)
+    if centroids:
+        for i, m in enumerate(centroids.route(embeddings)):
+            if m["route"]:
+                matches[i] = {"route": m["route"], "distance": m["distance"]}
+    todo = [i for i, m in enumerate(matches) if m is None]
+    if cache and todo:
+        for i, m in zip(todo, cache.check_batch([embeddings[i] for i in todo])):
+            matches[i] = m
+        todo = [i for i in todo if matches[i] is None]
+    if todo and quantized:
+        for i, m in zip(todo, quantized.route(embeddings[todo])):
+            matches[i] = m
+    elif todo:
+        dtype = vector_dtype(index.schema)
+        results = index.batch_query([_vector_query(embeddings[i], dtype) for i in todo], batch_size=QUERY_PIPELINE_SIZE)
+        for i, r in zip(todo, results):
+            matches[i] = _best_match(r)
+        if cache:
+            cache.store_batch([embeddings[i] for i in todo], [matches[i] for i in todo])
+    return [{"query": q, **m} for q, m in zip(queries, matches)]
+
+def load_route_embeddings(index):
+    """Reference embeddings per route (as float32), read back from the index's keys"""
+    import numpy as np
+
+    dtype = vector_dtype(index.schema)
+    # Reuse the index's connection when it has one (always the case under RouterRegistry)
+    redis_client = index.client or Redis.from_url(REDIS_URL, decode_responses=False)
+    try:
+        keys = list(redis_client.scan_iter(match=_scan_pattern(index.schema.index.prefix), count=1000))
+        by_route = {}
+        for start in range(0, len(keys), LOAD_CHUNK_SIZE):
+            pipe = redis_client.pipeline(transaction=False)
+            for key in keys[start:start + LOAD_CHUNK_SIZE]:
+                pipe.hmget(key, "route_name", "embedding")
+            for name, embedding in pipe.execute():
+                if name and embedding:
+                    vector = np.frombuffer(embedding, dtype=dtype).astype(np.float32)
+                    by_route.setdefault(name.decode(), []).append(vector)
+    finally:
+        if redis_client is not index.client:
+            redis_client.close()
+    return {name: np.stack(vectors) for name, vectors in by_route.items()}
+
+def build_quantized_router(index, kind: str = "int8", **options):
+    """In-process int8/PQ search with float32 rerank over what is loaded in the route index"""
+    from quantized import QuantizedRouter
+    return QuantizedRouter(load_route_embeddings(index), kind, **options)
+
+def build_centroid_router(index, prototypes: int = 1, margin: float = 0.05):
+    """CentroidRouter over what is currently loaded in the route index"""
+    from centroids import CentroidRouter
+    return CentroidRouter(load_route_embeddings(index), prototypes=prototypes, margin=margin)
+
+def open_semantic_cache(index, routes=None, **kwargs):
+    """SemanticCache on the router DB, emptied whenever the route catalog (ROUTES by default) changes"""
+    from semantic_cache import SemanticCache
+    routes = ROUTES if routes is None else routes
+    cache = SemanticCache(index.client or Redis.from_url(REDIS_URL), MODEL_DIMS, **kwargs)
+    cache.create(_fingerprint({"schema": index.schema.to_dict(), "encoder": ENCODER_ID, "routes": routes}))
+    return cache
+
+def route_query(index, query: str):
+    """Find the best route for a given query"""
+    match = route_batch(index, [query])[0]
+    if match["route"]:
+        print(match["route"])
     else:
         print("No suitable route found")
+    return match
+
+def bench_routing(index, queries, rounds: int = 5, centroids=None):
+    """Compare per-query routing with route_batch (and the centroid fast path) on the same queries"""
+    queries = list(queries)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for q in queries:
+            _best_match(index.query(_vector_query(model.encode(q), vector_dtype(index.schema))))
+    single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        route_batch(index, queries)
+    batched = time.perf_counter() - t0
+
+    total = len(queries) * rounds
+    print(f"[Bench] {total} queries: per-query {total / single:.0f} q/s, "
+          f"route_batch {total / batched:.0f} q/s ({single / batched:.1f}x)")
+
+    if centroids:
+        embeddings = model.encode(queries, convert_to_numpy=True)
+        counters = dict(centroids.stats)
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            fast = centroids.route(embeddings)
+        routed = time.perf_counter() - t0
+        centroids.stats = counters
+        confident = sum(1 for m in fast if m["route"])
+        print(f"[Bench] centroid routing {routed * 1e6 / total:.1f} us/query after encoding, "
+              f"{confident}/{len(queries)} above margin {centroids.margin}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic router on Redis")
+    parser.add_argument("queries", nargs="*", help="Queries to route (default: three sample queries)")
+    parser.add_argument("--rebuild", action="store_true", help="Recreate the index and re-embed every route")
+    parser.add_argument("--algorithm", choices=("flat", "hnsw"),
+                        help="Vector index algorithm (default: as the index was set up, else flat)")
+    parser.add_argument("--datatype", choices=("float32", "float16"),
+                        help="Stored vector precision (float16 halves index memory, needs Redis 7.4+; "
+                             "default: as the index was set up, else float32)")
+    parser.add_argument("--hnsw-m", type=int, default=HNSW_DEFAULTS["m"], help="HNSW M (links per node)")
+    parser.add_argument("--hnsw-ef-construction", type=int, default=HNSW_DEFAULTS["ef_construction"],
+                        help="HNSW EF_CONSTRUCTION")
+    parser.add_argument("--hnsw-ef-runtime", type=int, default=HNSW_DEFAULTS["ef_runtime"], help="HNSW EF_RUNTIME")
+    parser.add_argument("--bench", type=int, default=0,
+                        help="Benchmark per-query vs batched routing on this many generated queries")
+    parser.add_argument("--centroids", type=int, default=0,
+                        help="Route in-process against N prototypes per route (1 = centroid, 0 = off)")
+    parser.add_argument("--centroid-margin", type=float, default=0.05,
+                        help="Min similarity gap between the top two routes to skip the KNN search")
+    parser.add_argument("--quantized", choices=("int8", "pq"),
+                        help="Search in-process on int8/PQ codes with float32 rerank instead of the Redis index")
+    parser.add_argument("--semantic-cache", action="store_true",
+                        help="Answer near-duplicate queries from a Redis semantic cache")
+    parser.add_argument("--cache-threshold", type=float, default=0.05, help="Max cosine distance for a cache hit")
+    parser.add_argument("--cache-ttl", type=int, default=3600, help="Seconds a cached route is kept")
+    parser.add_argument("--cache-size", type=int, default=10000, help="Max cached queries (LRU eviction)")
+    args = parser.parse_args()
+    cache = centroids = quantized = None
 
-if __name__ == "__main__":
     try:
         # Initialize and load data
-        idx = setup_router()
-        
+        hnsw = {"m": args.hnsw_m, "ef_construction": args.hnsw_ef_construction, "ef_runtime": args.hnsw_ef_runtime}
+        schema = None
+        if args.algorithm or args.datatype:
+            schema = build_schema(args.algorithm or "flat", datatype=args.datatype or "float32", **hnsw)
+        idx = setup_router(force=args.rebuild, index_schema=schema)
+        if args.centroids:
+            centroids = build_centroid_router(idx, args.centroids, args.centroid_margin)
+        if args.quantized:
+            quantized = build_quantized_router(idx, args.quantized)
+        if args.semantic_cache:
+            cache = open_semantic_cache(idx, distance_threshold=args.cache_threshold, ttl=args.cache_ttl,
+                                        max_entries=args.cache_size)
+
         # Test Queries
-        test_queries = [
+        test_queries = args.queries or [
             "How do I use Python to fine-tune a Llama 3 model?",
             "What are the best movies about dystopian futures and robots?",
             "I want to listen to some symphonies by Beethoven."
         ]
-        
-        for q in test_queries:
-            route_query(idx, q)
-            
+
+        for match in route_batch(idx, test_queries, cache, centroids, quantized):
+            route = match["route"] or "No suitable route found"
+            distance = f" (distance {match['distance']:.4f})" if match["route"] else ""
+            print(f"{route}{distance}")
+
+        if args.bench:
+            references = [ref for refs in ROUTES.values() for ref in refs]
+            bench_routing(idx, [references[i % len(references)] + f" #{i}" for i in range(args.bench)],
+                          centroids=centroids)
+
     except Exception as e:
         print(f"Error in Semantic Router: {e}")
+        return 1
+    finally:
+        if EMBEDDING_CACHE_DIR and _model is not None:
+            print(f"[Cache] {len(_model)} embeddings on disk, {_model.stats}")
+        if centroids:
+            print(f"[Centroids] {centroids.stats['fast']} routed in-process, {centroids.stats['fallback']} fell back to KNN")
+        if cache:
+            print(f"[Cache] Semantic cache {cache.stats}, hit rate {cache.hit_rate():.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())